@@ -0,0 +1,12 @@
+from django.urls import path
+
+from . import async_views
+
+
+urlpatterns = [
+    path('tags/', async_views.tags),
+    path('recipes/', async_views.recipes),
+    path('recipes/<int:pk>/', async_views.recipe),
+    path('ingredients/', async_views.ingredients),
+    path('users/export/', async_views.user_export),
+]
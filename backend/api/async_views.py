@@ -0,0 +1,178 @@
+import asyncio
+import math
+
+from asgiref.sync import sync_to_async
+from django.core.paginator import Page, Paginator
+from django.db import close_old_connections
+from django.http import HttpResponse
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from recipes.archive import spool_archive
+from recipes.models import Ingredient, Recipe, Tag
+from .cache import get_page, render_recipes, set_page
+from .filters import IngredientSearch, RecipesFilter
+from .pagination import CustomPagination
+from .serializers import (IngredientSerializer, RecipeReadSerializer,
+                          TagSerializer, requested_fields)
+from .views import (CustomUserViewSet, IngredientViewSet, RecipeViewSet,
+                    TagViewSet, export_file_response)
+
+
+def run_in_thread(func, *args, **kwargs):
+    """
+    Выполнение ORM-запроса в пуле потоков.
+    Потоки независимы друг от друга, поэтому запросы из разных
+    вызовов идут к базе параллельно, каждый по своему соединению.
+    """
+    def wrapper():
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(wrapper, thread_sensitive=False)()
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(
+        api_settings.DEFAULT_RENDERER_CLASSES[0]().render(data),
+        status=status_code,
+        content_type='application/json',
+    )
+
+
+def authenticate(request):
+    """Аутентификация и ограничение частоты запросов так же, как в DRF."""
+    drf_request = Request(request, authenticators=[
+        auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    ])
+    drf_request.user
+    for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+        throttle = throttle_class()
+        if not throttle.allow_request(drf_request, None):
+            raise exceptions.Throttled(throttle.wait())
+    return drf_request
+
+
+def read_path(drf_view, handler):
+    """
+    GET-запросы обрабатываются асинхронно,
+    остальные методы передаются синхронному вьюсету.
+    """
+    async def view(request, *args, **kwargs):
+        if request.method != 'GET':
+            return await sync_to_async(drf_view)(request, *args, **kwargs)
+        try:
+            drf_request = await run_in_thread(authenticate, request)
+            return await handler(drf_request, *args, **kwargs)
+        except exceptions.APIException as error:
+            response = json_response(
+                {'detail': error.detail}, error.status_code)
+            if getattr(error, 'wait', None) is not None:
+                response['Retry-After'] = str(math.ceil(error.wait))
+            return response
+    view.csrf_exempt = True
+    # Для метрик: запросы учитываются по вьюсету и действию.
+    view.cls, view.actions = drf_view.cls, drf_view.actions
+    return view
+
+
+async def recipe_list(request):
+    """
+    Список рецептов: при промахе кэша подсчет и выборка id
+    рецептов страницы идут параллельно.
+    """
+    pagination = CustomPagination()
+    recipe_ids = await run_in_thread(get_page, request, pagination)
+    if recipe_ids is None:
+        filterset = RecipesFilter(request.query_params,
+                                  queryset=Recipe.objects.all(),
+                                  request=request)
+        if not await run_in_thread(filterset.is_valid):
+            return json_response(
+                filterset.errors, status.HTTP_400_BAD_REQUEST)
+        queryset = filterset.qs.values_list('pk', flat=True)
+        page_size = pagination.get_page_size(request)
+        try:
+            number = int(
+                request.query_params.get(pagination.page_query_param, 1))
+        except ValueError:
+            number = 0
+        if number < 1:
+            raise exceptions.NotFound(pagination.invalid_page_message)
+        bottom = (number - 1) * page_size
+        count, recipe_ids = await asyncio.gather(
+            run_in_thread(queryset.count),
+            run_in_thread(list, queryset[bottom:bottom + page_size]),
+        )
+        paginator = Paginator(queryset, page_size)
+        paginator.__dict__['count'] = count
+        if number > paginator.num_pages:
+            raise exceptions.NotFound(pagination.invalid_page_message)
+        pagination.page = Page(recipe_ids, number, paginator)
+        pagination.request = request
+        await run_in_thread(set_page, request, pagination, recipe_ids)
+    results = await run_in_thread(
+        render_recipes, request, recipe_ids,
+        requested_fields(request, RecipeReadSerializer),
+        RecipeViewSet.fast_read)
+    return json_response(pagination.get_paginated_response(results).data)
+
+
+async def recipe_detail(request, pk):
+    """Страница рецепта."""
+    results = await run_in_thread(
+        render_recipes, request, [pk],
+        requested_fields(request, RecipeReadSerializer),
+        RecipeViewSet.fast_read)
+    if not results:
+        raise exceptions.NotFound()
+    return json_response(results[0])
+
+
+async def tag_list(request):
+    """Список тегов."""
+    data = await run_in_thread(
+        lambda: TagSerializer(Tag.objects.all(), many=True).data)
+    return json_response(data)
+
+
+async def ingredient_list(request):
+    """Поиск ингредиентов по началу названия."""
+    def search():
+        queryset = IngredientSearch().filter_queryset(
+            request, Ingredient.objects.all(), IngredientViewSet)
+        return IngredientSerializer(queryset, many=True).data
+    return json_response(await run_in_thread(search))
+
+
+recipes = read_path(
+    RecipeViewSet.as_view({'get': 'list', 'post': 'create'}), recipe_list)
+recipe = read_path(
+    RecipeViewSet.as_view({
+        'get': 'retrieve', 'put': 'update',
+        'patch': 'partial_update', 'delete': 'destroy',
+    }),
+    recipe_detail)
+tags = read_path(
+    TagViewSet.as_view({'get': 'list', 'post': 'create'}), tag_list)
+ingredients = read_path(
+    IngredientViewSet.as_view({'get': 'list', 'post': 'create'}),
+    ingredient_list)
+
+
+async def export(request):
+    """
+    Архив пользователя под ASGI. Синхронные вьюсеты выполняются
+    в одном общем потоке, поэтому запись архива во временный файл
+    вынесена в отдельный поток пула и не задерживает остальные
+    запросы. Ответ начинается только после записи всего архива.
+    """
+    if not request.user.is_authenticated:
+        raise exceptions.NotAuthenticated()
+    file = await run_in_thread(spool_archive, request.user.pk)
+    return export_file_response(file)
+
+
+user_export = read_path(CustomUserViewSet.as_view({'get': 'export'}), export)
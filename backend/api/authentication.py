@@ -0,0 +1,52 @@
+from django.utils.functional import SimpleLazyObject
+from rest_framework import exceptions
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from users.models import User
+
+
+def add_role_claims(token, user):
+    """Роль пользователя записывается в токен при его выдаче."""
+    token['role'] = user.role
+    token['is_admin'] = user.is_admin
+    return token
+
+
+class TokenUser(SimpleLazyObject):
+    """
+    Пользователь, восстановленный из подписанного токена.
+    id и роль доступны без запроса к базе, остальные атрибуты
+    загружают пользователя из базы при первом обращении.
+    """
+
+    def __init__(self, token):
+        user_id = token[api_settings.USER_ID_CLAIM]
+
+        def load_user():
+            user = User.objects.filter(pk=user_id, is_active=True).first()
+            if user is None:
+                raise exceptions.AuthenticationFailed(
+                    'Пользователь не найден или неактивен')
+            return user
+
+        super().__init__(load_user)
+        self.__dict__.update(
+            id=user_id,
+            pk=user_id,
+            role=token.get('role'),
+            is_admin=token.get('is_admin', False),
+            is_authenticated=True,
+            is_anonymous=False,
+        )
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """Аутентификация по JWT без обращения к таблице пользователей."""
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(
+                'Токен не содержит идентификатора пользователя')
+        return TokenUser(validated_token)
@@ -0,0 +1,202 @@
+import hashlib
+import uuid
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscription
+from .fast_serializers import recipe_rows, represent_recipes
+from .metrics import count_cache
+from .serializers import RecipeReadSerializer
+
+# Сброс записей виден всем процессам только при общем кэше,
+# иначе приложение не запустится (проверка recipes.E001).
+FRAGMENT_KEY = 'recipe_fragment_%(version)s_%(id)s'
+FRAGMENT_VERSION_KEY = 'recipe_fragment_version'
+FRAGMENT_TIMEOUT = 60 * 60
+PAGE_KEY = 'recipe_page_%(version)s_%(params)s'
+PAGE_VERSION_KEY = 'recipe_page_version'
+# Порядок по популярности меняется без записи рецептов,
+# поэтому страницы хранятся недолго.
+PAGE_TIMEOUT = 60
+USER_FIELDS = {
+    'is_favorited': Favorite,
+    'is_in_shopping_cart': ShoppingCart,
+}
+SHARED_FIELDS = tuple(
+    name for name in RecipeReadSerializer.Meta.fields
+    if name not in USER_FIELDS
+)
+# Параметры, которые влияют только на вывод, но не на выборку.
+RENDER_PARAMS = ('fields', 'omit', 'format')
+
+
+def get_version(key):
+    """
+    Версия группы ключей. Новая версия - случайная строка, поэтому
+    потеря ключа версии не может вернуть устаревшие данные.
+    """
+    version = cache.get(key)
+    if version is not None:
+        return version
+    cache.add(key, uuid.uuid4().hex, None)
+    return cache.get(key)
+
+
+def bump_version(key):
+    cache.set(key, uuid.uuid4().hex, None)
+
+
+def fragment_keys(recipe_ids):
+    version = get_version(FRAGMENT_VERSION_KEY)
+    return {
+        recipe_id: FRAGMENT_KEY % {'version': version, 'id': recipe_id}
+        for recipe_id in recipe_ids
+    }
+
+
+def invalidate_recipe(recipe_id):
+    invalidate_recipes([recipe_id])
+
+
+def invalidate_recipes(recipe_ids):
+    cache.delete_many(fragment_keys(recipe_ids).values())
+    bump_version(PAGE_VERSION_KEY)
+
+
+def invalidate_author(author_id):
+    recipe_ids = Recipe.objects.filter(author=author_id).values_list(
+        'pk', flat=True)
+    cache.delete_many(fragment_keys(recipe_ids).values())
+
+
+def invalidate_all():
+    bump_version(FRAGMENT_VERSION_KEY)
+    bump_version(PAGE_VERSION_KEY)
+
+
+def recipe_fragments(request, recipe_ids, fast=False):
+    """
+    Не зависящая от пользователя часть представления рецептов:
+    без признаков избранного, списка покупок и подписки на автора,
+    с относительным адресом изображения. При fast=True представления
+    строятся из строк values() (api/fast_serializers.py).
+    """
+    keys = fragment_keys(recipe_ids)
+    cached = cache.get_many(keys.values())
+    fragments = {
+        recipe_id: cached[key]
+        for recipe_id, key in keys.items() if key in cached
+    }
+    missing = [
+        recipe_id for recipe_id in recipe_ids if recipe_id not in fragments]
+    count_cache('recipe_fragment', len(fragments), len(missing))
+    if missing:
+        queryset = RecipeReadSerializer.prepare_queryset(
+            Recipe.objects.filter(pk__in=missing), request, SHARED_FIELDS)
+        if fast:
+            items = represent_recipes(
+                recipe_rows(queryset, SHARED_FIELDS), SHARED_FIELDS)
+        else:
+            items = RecipeReadSerializer(
+                queryset, many=True, fields=SHARED_FIELDS).data
+        loaded = {item['id']: item for item in items}
+        cache.set_many(
+            {keys[recipe_id]: item for recipe_id, item in loaded.items()},
+            FRAGMENT_TIMEOUT)
+        fragments.update(loaded)
+    return fragments
+
+
+def user_flags(request, fragments, fields):
+    """Id рецептов в избранном и списке покупок, id авторов в подписках."""
+    flags = {name: set() for name in USER_FIELDS}
+    subscribed = set()
+    user_id = request.user.id
+    if not request.user.is_authenticated:
+        return flags, subscribed
+    for name, model in USER_FIELDS.items():
+        if name in fields:
+            flags[name] = set(model.objects.filter(
+                user=user_id, recipe__in=fragments).values_list(
+                    'recipe', flat=True))
+    if 'author' in fields:
+        subscribed = set(Subscription.objects.filter(
+            user=user_id,
+            author__in={item['author']['id'] for item in fragments.values()},
+        ).values_list('author', flat=True))
+    return flags, subscribed
+
+
+def render_recipes(request, recipe_ids, fields, fast=False):
+    """
+    Рецепты в порядке recipe_ids с запрошенными полями: общие части
+    берутся из кэша, признаки пользователя добавляются к ним.
+    """
+    fragments = recipe_fragments(request, recipe_ids, fast)
+    flags, subscribed = user_flags(request, fragments, fields)
+    results = []
+    for recipe_id in recipe_ids:
+        if recipe_id not in fragments:
+            continue
+        data = dict(fragments[recipe_id])
+        data['author'] = dict(
+            data['author'],
+            is_subscribed=data['author']['id'] in subscribed)
+        if data['image']:
+            data['image'] = request.build_absolute_uri(data['image'])
+        for name, recipes in flags.items():
+            data[name] = recipe_id in recipes
+        results.append({
+            name: data[name]
+            for name in RecipeReadSerializer.Meta.fields if name in fields
+        })
+    return results
+
+
+def page_key(request):
+    """
+    Ключ страницы списка; None, если выборка зависит от пользователя
+    (фильтры по избранному и списку покупок).
+    """
+    params = request.query_params
+    if any(name in params for name in USER_FIELDS):
+        return None
+    items = sorted(
+        (name, value) for name in params if name not in RENDER_PARAMS
+        for value in params.getlist(name))
+    return PAGE_KEY % {
+        'version': get_version(PAGE_VERSION_KEY),
+        'params': hashlib.md5(urlencode(items).encode()).hexdigest(),
+    }
+
+
+def get_page(request, pagination):
+    """
+    Id рецептов страницы из кэша. Состояние пагинатора DRF
+    восстанавливается для построения ссылок на соседние страницы.
+    """
+    key = page_key(request)
+    if key is None:
+        return None
+    entry = cache.get(key)
+    count_cache('recipe_page', entry is not None, entry is None)
+    if entry is None:
+        return None
+    count, number, recipe_ids = entry
+    paginator = Paginator((), pagination.get_page_size(request))
+    paginator.__dict__['count'] = count
+    pagination.page = Page(recipe_ids, number, paginator)
+    pagination.request = request
+    return recipe_ids
+
+
+def set_page(request, pagination, recipe_ids):
+    key = page_key(request)
+    if key:
+        page = pagination.page
+        cache.set(
+            key, (page.paginator.count, page.number, list(recipe_ids)),
+            PAGE_TIMEOUT)
@@ -0,0 +1,109 @@
+"""
+Представления для чтения, построенные из строк values() обычными
+словарями, без полей DRF. Вывод совпадает с RecipeReadSerializer
+и CustomUserSerializer; включается атрибутом вьюсета fast_read.
+"""
+from recipes.documents import build_documents
+from recipes.models import Recipe
+from users.models import Subscription
+from .serializers import CustomUserSerializer, RecipeReadSerializer
+
+RECIPE_COLUMNS = ('name', 'image', 'text', 'cooking_time')
+DOCUMENT_FIELDS = ('tags', 'author', 'ingredients')
+FLAG_FIELDS = ('is_favorited', 'is_in_shopping_cart')
+USER_COLUMNS = ('email', 'id', 'username', 'first_name', 'last_name')
+
+
+def annotated(queryset, fields):
+    return [
+        name for name in fields if name in queryset.query.annotations]
+
+
+def recipe_rows(queryset, fields):
+    """
+    Строки рецептов с колонками запрошенных полей и признаками,
+    добавленными RecipeReadSerializer.prepare_queryset.
+    """
+    columns = ['id', *(name for name in RECIPE_COLUMNS if name in fields)]
+    if set(DOCUMENT_FIELDS) & set(fields):
+        columns += ['author_id', 'document']
+    return queryset.values(*columns, *annotated(queryset, FLAG_FIELDS))
+
+
+def subscribed_authors(request, author_ids):
+    if request is None or not request.user.is_authenticated:
+        return set()
+    return set(Subscription.objects.filter(
+        user=request.user.id, author__in=author_ids).values_list(
+            'author', flat=True))
+
+
+def fill_documents(rows):
+    """Документы, еще не заполненные rebuild_recipe_documents."""
+    empty = [row for row in rows if not row['document']]
+    if empty:
+        documents = build_documents([row['id'] for row in empty])
+        for row in empty:
+            row['document'] = documents[row['id']]
+
+
+def represent_recipes(rows, fields, request=None):
+    """Представления рецептов в порядке строк."""
+    rows = list(rows)
+    if set(DOCUMENT_FIELDS) & set(fields):
+        fill_documents(rows)
+    subscribed = set()
+    if 'author' in fields:
+        subscribed = subscribed_authors(
+            request, {row['author_id'] for row in rows})
+    storage = Recipe._meta.get_field('image').storage
+    fields = [
+        name for name in RecipeReadSerializer.Meta.fields if name in fields]
+    results = []
+    for row in rows:
+        data = {}
+        for name in fields:
+            if name in DOCUMENT_FIELDS:
+                data[name] = row['document'][name]
+            elif name in FLAG_FIELDS:
+                data[name] = row.get(name, False)
+            elif name == 'image':
+                data[name] = image_url(storage, row['image'], request)
+            else:
+                data[name] = row[name]
+        if 'author' in data:
+            data['author'] = dict(
+                data['author'],
+                is_subscribed=data['author']['id'] in subscribed)
+        results.append(data)
+    return results
+
+
+def image_url(storage, name, request):
+    """Адрес изображения, как его выводит ImageField DRF."""
+    if not name:
+        return None
+    url = storage.url(name)
+    if request is None:
+        return url
+    return request.build_absolute_uri(url)
+
+
+def user_rows(queryset, fields):
+    columns = [name for name in USER_COLUMNS if name in fields]
+    return queryset.values(*columns, *annotated(queryset, ('is_subscribed',)))
+
+
+def represent_users(rows, fields):
+    """
+    Представления пользователей. Признак подписки берется из аннотации
+    CustomUserSerializer.prepare_queryset; без нее (анонимный
+    пользователь) он ложный.
+    """
+    fields = [
+        name for name in CustomUserSerializer.Meta.fields if name in fields]
+    return [
+        {name: row.get(name, False) if name == 'is_subscribed' else row[name]
+         for name in fields}
+        for row in rows
+    ]
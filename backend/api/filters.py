@@ -1,3 +1,4 @@
+from django.db.models import Exists, OuterRef
 from django_filters import rest_framework
 from rest_framework import filters
 
@@ -20,24 +21,61 @@ class RecipesFilter(rest_framework.FilterSet):
     tags = rest_framework.ModelMultipleChoiceFilter(
         field_name='tags__slug',
         to_field_name='slug',
-        queryset=Tag.objects.all()
+        queryset=Tag.objects.all(),
+        method='filter_tags',
+    )
+    tags_mode = rest_framework.ChoiceFilter(
+        choices=(('any', 'Любой из тегов'), ('all', 'Все теги')),
+        method='filter_tags_mode',
+    )
+    ordering = rest_framework.ChoiceFilter(
+        choices=(('popular', 'По популярности'),),
+        method='sort_recipes',
     )
 
     class Meta:
         model = Recipe
-        fields = ('is_favorited', 'is_in_shopping_cart', 'author', 'tags')
+        fields = (
+            'is_favorited', 'is_in_shopping_cart', 'author',
+            'tags', 'tags_mode', 'ordering',
+        )
 
     def filter_is_favorited(self, queryset, name, value):
         if value and not self.request.user.is_anonymous:
-            return queryset.filter(favorite_recipe__user=self.request.user)
+            return queryset.filter(
+                favorite_recipe__user=self.request.user.id)
         return queryset
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
         if value and not self.request.user.is_anonymous:
             return queryset.filter(
-                shopping_cart_recipe__user=self.request.user)
+                shopping_cart_recipe__user=self.request.user.id)
         return queryset
 
+    def filter_tags(self, queryset, name, tags):
+        """
+        Фильтрация через EXISTS по таблице связей рецептов и тегов:
+        каждый рецепт попадает в выборку один раз, без JOIN и DISTINCT.
+        """
+        if not tags:
+            return queryset
+        recipe_tags = Recipe.tags.through.objects.filter(
+            recipe=OuterRef('pk'))
+        if self.form.cleaned_data.get('tags_mode') == 'all':
+            for tag in tags:
+                queryset = queryset.filter(
+                    Exists(recipe_tags.filter(tag=tag)))
+            return queryset
+        return queryset.filter(Exists(recipe_tags.filter(tag__in=tags)))
+
+    def filter_tags_mode(self, queryset, name, value):
+        """Режим учитывается в filter_tags."""
+        return queryset
+
+    def sort_recipes(self, queryset, name, value):
+        """Сортировка по индексированному полю популярности."""
+        return queryset.order_by('-popularity', '-pub_date')
+
 
 class IngredientSearch(filters.SearchFilter):
     """Кастомизация поиска по ингредиентам."""
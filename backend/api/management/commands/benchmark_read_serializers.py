@@ -0,0 +1,90 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.fast_serializers import (recipe_rows, represent_recipes,
+                                  represent_users, user_rows)
+from api.serializers import CustomUserSerializer, RecipeReadSerializer
+from recipes.models import Recipe
+from users.models import User
+
+
+def recipes_drf(request, queryset):
+    fields = RecipeReadSerializer.Meta.fields
+    queryset = RecipeReadSerializer.prepare_queryset(
+        queryset, request, fields)
+    return RecipeReadSerializer(
+        queryset, many=True, context={'request': request}).data
+
+
+def recipes_fast(request, queryset):
+    fields = RecipeReadSerializer.Meta.fields
+    queryset = RecipeReadSerializer.prepare_queryset(
+        queryset, request, fields)
+    return represent_recipes(recipe_rows(queryset, fields), fields, request)
+
+
+def users_drf(request, queryset):
+    fields = CustomUserSerializer.Meta.fields
+    queryset = CustomUserSerializer.prepare_queryset(
+        queryset, request, fields)
+    return CustomUserSerializer(
+        queryset, many=True, context={'request': request}).data
+
+
+def users_fast(request, queryset):
+    fields = CustomUserSerializer.Meta.fields
+    queryset = CustomUserSerializer.prepare_queryset(
+        queryset, request, fields)
+    return represent_users(user_rows(queryset, fields), fields)
+
+
+BENCHMARKS = (
+    ('Рецепты', Recipe.objects.order_by('-pub_date', '-pk'),
+     recipes_drf, recipes_fast),
+    ('Пользователи', User.objects.order_by('pk'), users_drf, users_fast),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнение сериализаторов DRF и представлений из values() '
+        '(api/fast_serializers.py): совпадение вывода и время CPU '
+        'на страницу'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', help='Email пользователя, от имени которого запросы')
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument(
+            '--pages', type=int, default=20,
+            help='Количество проверяемых страниц')
+
+    def handle(self, *args, **options):
+        request = Request(APIRequestFactory().get('/'))
+        if options['user']:
+            request.user = User.objects.filter(email=options['user']).first()
+            if request.user is None:
+                raise CommandError('Пользователь не найден')
+        size = options['page_size']
+        for name, queryset, drf, fast in BENCHMARKS:
+            timings = {drf: 0, fast: 0}
+            for number in range(options['pages']):
+                page = queryset[number * size:(number + 1) * size]
+                results = {}
+                for func in (drf, fast):
+                    started = time.process_time()
+                    results[func] = [dict(item) for item in func(
+                        request, page)]
+                    timings[func] += time.process_time() - started
+                if results[drf] != results[fast]:
+                    raise CommandError(
+                        f'{name}: вывод различается на странице {number + 1}')
+            pages = options['pages']
+            self.stdout.write(
+                f'{name}: DRF {timings[drf] / pages * 1000:.1f} мс, '
+                f'values() {timings[fast] / pages * 1000:.1f} мс CPU '
+                f'на страницу из {size}')
@@ -0,0 +1,87 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.views import CustomUserViewSet, RecipeViewSet
+from users.models import User
+
+try:
+    from api.renderers import ORJSONRenderer
+except ImportError:
+    ORJSONRenderer = None
+
+RECIPE_FIELDS = 'id,name,image,cooking_time'
+USER_FIELDS = 'id,username'
+
+BENCHMARKS = (
+    ('Рецепты', RecipeViewSet, '/api/recipes/', 'recipe_fields'),
+    ('Пользователи', CustomUserViewSet, '/api/users/', 'user_fields'),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Размер ответа и время CPU на страницу списков рецептов '
+        'и пользователей: все поля и только поля из --recipe-fields '
+        '(--user-fields), рендереры JSON DRF и orjson'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', help='Email пользователя, от имени которого запросы')
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument(
+            '--pages', type=int, default=20,
+            help='Количество запрашиваемых страниц')
+        parser.add_argument('--recipe-fields', default=RECIPE_FIELDS)
+        parser.add_argument('--user-fields', default=USER_FIELDS)
+
+    def measure(self, view, path, params, options):
+        """
+        Средние размер ответа в байтах и время CPU на страницу.
+        Страницы после последней не запрашиваются.
+        """
+        factory = APIRequestFactory()
+        size = pages = 0
+        started = time.process_time()
+        for page in range(1, options['pages'] + 1):
+            request = factory.get(path, {
+                **params, 'page': page, 'limit': options['page_size']})
+            if options['user']:
+                force_authenticate(request, user=options['user'])
+            response = view(request)
+            if response.status_code != 200:
+                raise CommandError(f'{path}: ответ {response.status_code}')
+            size += len(response.render().content)
+            pages += 1
+            if not response.data['next']:
+                break
+        elapsed = time.process_time() - started
+        return size / pages, elapsed / pages * 1000
+
+    def handle(self, *args, **options):
+        if options['user']:
+            options['user'] = User.objects.filter(
+                email=options['user']).first()
+            if options['user'] is None:
+                raise CommandError('Пользователь не найден')
+        renderers = {'DRF': JSONRenderer}
+        if ORJSONRenderer is not None:
+            renderers['orjson'] = ORJSONRenderer
+        for name, viewset, path, option in BENCHMARKS:
+            fields = options[option]
+            for renderer_name, renderer in renderers.items():
+                view = viewset.as_view(
+                    {'get': 'list'}, renderer_classes=(renderer,),
+                    throttle_classes=())
+                for title, params in (('все поля', {}),
+                                      (fields, {'fields': fields})):
+                    # Первый проход заполняет кэш рецептов.
+                    self.measure(view, path, params, options)
+                    size, cpu = self.measure(view, path, params, options)
+                    self.stdout.write(
+                        f'{name}, {renderer_name}, {title}: '
+                        f'{size / 1024:.1f} КБ, {cpu:.1f} мс CPU '
+                        f'на страницу из {options["page_size"]}')
@@ -0,0 +1,72 @@
+import glob
+import gzip
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+def read_entries(path):
+    """
+    Записи журнала и его архивов после logrotate (slow_queries.log.1,
+    slow_queries.log.2.gz и т.д.).
+    """
+    for name in sorted(glob.glob(f'{glob.escape(path)}*')):
+        opener = gzip.open if name.endswith('.gz') else open
+        with opener(name, 'rt', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def aggregate(entries):
+    """Сводка по отпечаткам запросов."""
+    report = {}
+    for entry in entries:
+        item = report.setdefault(entry['fingerprint'], {
+            'count': 0, 'total_ms': 0, 'max_ms': 0, 'sql': entry['sql'],
+            'stack': entry['stack'], 'plan': None, 'last': entry['time'],
+        })
+        item['count'] += 1
+        item['total_ms'] += entry['duration_ms']
+        item['max_ms'] = max(item['max_ms'], entry['duration_ms'])
+        item['last'] = max(item['last'], entry['time'])
+        if item['plan'] is None and entry.get('plan'):
+            item['plan'] = entry['plan']
+    return report
+
+
+class Command(BaseCommand):
+    help = 'Сводка журнала медленных запросов по отпечаткам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--log', default=settings.SLOW_QUERY_LOG,
+            help='Путь к журналу медленных запросов')
+        parser.add_argument(
+            '--limit', type=int, default=10,
+            help='Количество запросов в сводке')
+        parser.add_argument(
+            '--plans', action='store_true',
+            help='Выводить планы запросов')
+
+    def handle(self, *args, **options):
+        report = aggregate(read_entries(options['log']))
+        items = sorted(
+            report.items(), key=lambda item: item[1]['total_ms'],
+            reverse=True)[:options['limit']]
+        for key, item in items:
+            self.stdout.write(
+                f'{key}: {item["count"]} раз, всего {item["total_ms"]:.0f} '
+                f'мс, среднее {item["total_ms"] / item["count"]:.1f} мс, '
+                f'максимум {item["max_ms"]:.1f} мс, последний {item["last"]}')
+            self.stdout.write(f'  {item["sql"][:500]}')
+            for frame in item['stack']:
+                self.stdout.write(f'    {frame}')
+            if options['plans'] and item['plan']:
+                for line in item['plan']:
+                    self.stdout.write(f'    | {line}')
+        if not report:
+            self.stdout.write('Медленных запросов нет')
@@ -0,0 +1,135 @@
+import asyncio
+import os
+import time
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.decorators import sync_and_async_middleware
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess)
+
+# Переменную задает gunicorn.conf.py. Если она задана и другим процессам
+# (run_worker, manage.py), каталога может не быть, а без него
+# prometheus_client не может создать файлы значений метрик.
+if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+REQUEST_DURATION = Histogram(
+    'foodgram_http_request_duration_seconds',
+    'Время обработки запроса',
+    ('view', 'action', 'method', 'status'),
+)
+DB_QUERIES = Counter(
+    'foodgram_db_queries_total',
+    'Количество запросов к базе данных',
+    ('alias',),
+)
+DB_QUERY_DURATION = Histogram(
+    'foodgram_db_query_duration_seconds',
+    'Время выполнения запросов к базе данных',
+    ('alias',),
+    buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5),
+)
+CACHE_REQUESTS = Counter(
+    'foodgram_cache_requests_total',
+    'Обращения к кэшу по результату (hit, miss)',
+    ('cache', 'result'),
+)
+PDF_RENDER_DURATION = Histogram(
+    'foodgram_shopping_cart_render_seconds',
+    'Время формирования PDF со списком покупок',
+)
+PDF_SIZE = Histogram(
+    'foodgram_shopping_cart_pdf_bytes',
+    'Размер PDF со списком покупок',
+    buckets=(2 ** 12, 2 ** 14, 2 ** 15, 2 ** 16, 2 ** 17, 2 ** 18, 2 ** 20),
+)
+THROTTLE_REJECTED = Counter(
+    'foodgram_throttle_rejected_total',
+    'Запросы, отклоненные ограничением частоты',
+    ('scope', 'action'),
+)
+WORKER_START_TIME = Gauge(
+    'foodgram_worker_start_time_seconds',
+    'Время запуска процесса-воркера',
+    multiprocess_mode='liveall',
+)
+WORKER_START_TIME.set_to_current_time()
+
+
+def count_cache(cache, hits, misses):
+    if hits:
+        CACHE_REQUESTS.labels(cache, 'hit').inc(hits)
+    if misses:
+        CACHE_REQUESTS.labels(cache, 'miss').inc(misses)
+
+
+def observe_query(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        alias = context['connection'].alias
+        DB_QUERIES.labels(alias).inc()
+        DB_QUERY_DURATION.labels(alias).observe(
+            time.perf_counter() - started)
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    """Учет запросов во всех соединениях, в том числе из пула потоков."""
+    if observe_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(observe_query)
+
+
+def view_labels(request):
+    """Имя вьюсета и действие DRF (или имя обычного представления)."""
+    match = request.resolver_match
+    if match is None:
+        return 'unresolved', ''
+    view_class = getattr(match.func, 'cls', None)
+    if view_class is None:
+        return match.view_name or match.func.__name__, ''
+    actions = getattr(match.func, 'actions', None) or {}
+    method = request.method.lower()
+    return view_class.__name__, actions.get(method, method)
+
+
+def observe_request(request, response, started):
+    view, action = view_labels(request)
+    REQUEST_DURATION.labels(
+        view, action, request.method, response.status_code,
+    ).observe(time.perf_counter() - started)
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    """Время обработки запросов по вьюсетам и действиям."""
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            started = time.perf_counter()
+            response = await get_response(request)
+            observe_request(request, response, started)
+            return response
+    else:
+        def middleware(request):
+            started = time.perf_counter()
+            response = get_response(request)
+            observe_request(request, response, started)
+            return response
+    return middleware
+
+
+def metrics_view(request):
+    """
+    Метрики в формате Prometheus. Если задана переменная
+    PROMETHEUS_MULTIPROC_DIR, значения собираются со всех воркеров.
+    """
+    registry = REGISTRY
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return HttpResponse(
+        generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -1,7 +1,64 @@
-from rest_framework.pagination import PageNumberPagination
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (Cursor, CursorPagination,
+                                       PageNumberPagination)
 
 
 class CustomPagination(PageNumberPagination):
     """Кастомизация пагинации для пользователей, рецептов."""
 
     page_size_query_param = 'limit'
+
+
+class FeedPagination(CursorPagination):
+    """
+    Постраничный вывод ленты подписок по курсору. Позиция курсора -
+    дата публикации и id рецепта крайней записи страницы, записи
+    выбирает функция fetch(position, reverse, limit).
+    """
+
+    page_size_query_param = 'limit'
+    ordering = ('-pub_date', '-id')
+
+    def decode_position(self, cursor):
+        try:
+            pub_date, recipe_id = cursor.position.split('|')
+            position = (parse_datetime(pub_date), int(recipe_id))
+        except (AttributeError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if position[0] is None:
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def paginate(self, request, fetch):
+        """Id рецептов страницы в порядке ленты."""
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        position = None if cursor is None else self.decode_position(cursor)
+        reverse = cursor is not None and cursor.reverse
+        items = fetch(position, reverse, self.page_size + 1)
+        has_more = len(items) > self.page_size
+        items = items[:self.page_size]
+        if reverse:
+            items.reverse()
+        # Назад читают со страницы, после которой записи есть.
+        has_next = has_more if not reverse else bool(items)
+        has_previous = has_more if reverse else cursor is not None
+        self.next_item = items[-1] if has_next and items else None
+        self.previous_item = items[0] if has_previous and items else None
+        return [recipe_id for _, recipe_id in items]
+
+    def link(self, item, reverse):
+        if item is None:
+            return None
+        pub_date, recipe_id = item
+        return self.encode_cursor(Cursor(
+            offset=0, reverse=reverse,
+            position=f'{pub_date.isoformat()}|{recipe_id}'))
+
+    def get_next_link(self):
+        return self.link(self.next_item, False)
+
+    def get_previous_link(self):
+        return self.link(self.previous_item, True)
@@ -0,0 +1,41 @@
+import io
+from functools import lru_cache
+
+from django.conf import settings
+
+FONT_NAME = 'Arial'
+
+
+@lru_cache(maxsize=None)
+def register_font():
+    """
+    Регистрация шрифта в reportlab. reportlab импортируется только здесь,
+    поэтому процессы, не формирующие PDF, его не загружают.
+    """
+    from reportlab.pdfbase import pdfmetrics, ttfonts
+    pdfmetrics.registerFont(ttfonts.TTFont(FONT_NAME, settings.FONT_PATH))
+
+
+def shopping_list(products):
+    """PDF со списком покупок: название, единица измерения, количество."""
+    from reportlab.lib import pagesizes, units
+    from reportlab.pdfgen import canvas
+
+    register_font()
+    buffer = io.BytesIO()
+    template = canvas.Canvas(buffer, pagesize=pagesizes.A4, bottomup=0)
+    textobject = template.beginText()
+    textobject.setTextOrigin(2 * units.cm, 2 * units.cm)
+    textobject.setFont(FONT_NAME, 14)
+    textobject.textLine('СПИСОК ПОКУПОК:')
+    textobject.moveCursor(0, 14)
+    for product in products:
+        textobject.textLine(
+            f"{product['ingredient__name']} "
+            f"({product['ingredient__measurement_unit']}) - "
+            f"{product['quantity']}")
+    template.drawText(textobject)
+    template.showPage()
+    template.save()
+    buffer.seek(0)
+    return buffer
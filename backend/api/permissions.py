@@ -23,4 +23,4 @@ class IsAuthorOrAdminOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         return (request.method in permissions.SAFE_METHODS
                 or request.user.is_admin
-                or obj.author == request.user)
+                or obj.author_id == request.user.id)
@@ -0,0 +1,20 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Вывод JSON через orjson.
+    Типы, которые orjson не поддерживает (Decimal, ленивые строки),
+    преобразуются так же, как в стандартном рендерере DRF. Ключи
+    не-строки (номера элементов в ошибках ListField) становятся
+    строками, как в json.dumps.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return orjson.dumps(
+            data, default=JSONEncoder().default,
+            option=orjson.OPT_NON_STR_KEYS)
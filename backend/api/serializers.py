@@ -1,15 +1,78 @@
 import base64
 
 from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Exists, OuterRef
 from djoser.serializers import UserSerializer
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import (TokenObtainPairSerializer,
+                                                  TokenRefreshSerializer)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 
 from users.models import User, Subscription
 from recipes.models import (Tag, Ingredient, Recipe, RecipeIngredient,
                             ShoppingCart, Favorite)
+from recipes.documents import build_document
+from .authentication import add_role_claims
 
 
-class CustomUserSerializer(UserSerializer):
+def requested_fields(request, serializer_class):
+    """
+    Поля ответа по параметрам запроса fields и omit (через запятую).
+    Неизвестные имена полей игнорируются.
+    """
+    fields = set(serializer_class.Meta.fields)
+    if request.query_params.get('fields'):
+        fields &= set(request.query_params['fields'].split(','))
+    if request.query_params.get('omit'):
+        fields -= set(request.query_params['omit'].split(','))
+    return fields
+
+
+def page_objects(serializer, obj):
+    """Объекты страницы, которую выводит родительский сериализатор списка."""
+    parent = serializer.parent
+    if (isinstance(parent, serializers.ListSerializer)
+            and parent.instance is not None):
+        return parent.instance
+    return [obj]
+
+
+def is_subscribed(context, author_id, page_author_ids):
+    """
+    Подписан ли пользователь запроса на автора. Подписки проверяются
+    одним запросом сразу для всех авторов страницы (их id возвращает
+    функция page_author_ids), результат сохраняется в контексте
+    сериализатора на время сериализации ответа.
+    """
+    request = context.get('request')
+    if (request is None or not request.user.is_authenticated
+            or author_id == request.user.id):
+        return False
+    checked = context.setdefault('checked_authors', set())
+    subscribed = context.setdefault('subscribed_authors', set())
+    if author_id not in checked:
+        author_ids = set(page_author_ids()) | {author_id}
+        checked |= author_ids
+        subscribed |= set(Subscription.objects.filter(
+            user=request.user.id, author__in=author_ids).values_list(
+                'author', flat=True))
+    return author_id in subscribed
+
+
+class SparseFieldsMixin:
+    """Сериализатор, выводящий только поля из аргумента fields."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class CustomUserSerializer(SparseFieldsMixin, UserSerializer):
     """Сериализатор для работы с пользователями и подписками."""
     is_subscribed = serializers.SerializerMethodField(read_only=True)
 
@@ -20,12 +83,20 @@ class CustomUserSerializer(UserSerializer):
             'last_name', 'is_subscribed'
         )
 
+    @staticmethod
+    def prepare_queryset(queryset, request, fields):
+        """Признак подписки вычисляется в том же запросе, что и список."""
+        if not request.user.is_authenticated or 'is_subscribed' not in fields:
+            return queryset
+        return queryset.annotate(is_subscribed=Exists(
+            Subscription.objects.filter(
+                user=request.user.id, author=OuterRef('pk'))))
+
     def get_is_subscribed(self, obj):
-        request = self.context['request']
-        if request.user.is_authenticated:
-            user_subscriptions = Subscription.objects.filter(user=request.user)
-            return user_subscriptions.filter(author=obj.pk).exists()
-        return False
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return is_subscribed(self.context, obj.pk, lambda: (
+            user.pk for user in page_objects(self, obj)))
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -66,12 +137,11 @@ class RecipeIngredientWriteSerializer(serializers.ModelSerializer):
         fields = ('id', 'amount')
 
 
-class RecipeReadSerializer(serializers.ModelSerializer):
+class RecipeReadSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор рецептов при GET запросах."""
-    tags = TagSerializer(many=True, read_only=True)
-    author = CustomUserSerializer(read_only=True)
-    ingredients = RecipeIngredientReadSerializer(
-        many=True, read_only=True, source='recipeIngredient')
+    tags = serializers.SerializerMethodField(read_only=True)
+    author = serializers.SerializerMethodField(read_only=True)
+    ingredients = serializers.SerializerMethodField(read_only=True)
     is_favorited = serializers.SerializerMethodField(read_only=True)
     is_in_shopping_cart = serializers.SerializerMethodField(read_only=True)
 
@@ -82,17 +152,62 @@ class RecipeReadSerializer(serializers.ModelSerializer):
             'is_favorited', 'is_in_shopping_cart',
             'name', 'image', 'text', 'cooking_time')
 
+    @staticmethod
+    def prepare_queryset(queryset, request, fields):
+        """
+        Документ для чтения и флаги пользователя загружаются только
+        для запрошенных полей.
+        """
+        if 'text' not in fields:
+            queryset = queryset.defer('text')
+        if not {'tags', 'author', 'ingredients'} & set(fields):
+            queryset = queryset.defer('document')
+        if request.user.is_authenticated:
+            for name, model in (('is_favorited', Favorite),
+                                ('is_in_shopping_cart', ShoppingCart)):
+                if name in fields:
+                    queryset = queryset.annotate(**{name: Exists(
+                        model.objects.filter(
+                            user=request.user.id, recipe=OuterRef('pk')))})
+        return queryset
+
+    def get_tags(self, obj):
+        if obj.document:
+            return obj.document['tags']
+        return TagSerializer(obj.tags.all(), many=True).data
+
+    def get_author(self, obj):
+        """
+        Автор из документа рецепта; документ еще не заполнен
+        (до выполнения rebuild_recipe_documents) - из таблицы пользователей.
+        """
+        subscribed = is_subscribed(self.context, obj.author_id, lambda: (
+            recipe.author_id for recipe in page_objects(self, obj)))
+        if not obj.document:
+            return CustomUserSerializer(obj.author, context=self.context).data
+        return dict(obj.document['author'], is_subscribed=subscribed)
+
+    def get_ingredients(self, obj):
+        if obj.document:
+            return obj.document['ingredients']
+        return RecipeIngredientReadSerializer(
+            obj.recipeIngredient.all(), many=True).data
+
     def recipe_status(self, model, obj):
         request = self.context['request']
         if request.user.is_authenticated:
-            user_recipes = model.objects.filter(user=request.user)
+            user_recipes = model.objects.filter(user=request.user.id)
             return user_recipes.filter(recipe=obj.pk).exists()
         return False
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         return self.recipe_status(Favorite, obj)
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         return self.recipe_status(ShoppingCart, obj)
 
 
@@ -144,14 +259,18 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
     def add_tags(self, recipe, tags):
         recipe.tags.set(tags)
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
         recipe = Recipe.objects.create(**validated_data)
         self.add_ingredients(recipe, ingredients)
         self.add_tags(recipe, tags)
+        recipe.document = build_document(recipe)
+        recipe.save(update_fields=('document',))
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         instance.ingredients.clear()
         instance.tags.clear()
@@ -164,6 +283,7 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             self.add_ingredients(instance, validated_data.pop('ingredients'))
         if 'tags' in validated_data:
             self.add_tags(instance, validated_data.pop('tags'))
+        instance.document = build_document(instance)
         instance.save()
         return instance
 
@@ -213,3 +333,40 @@ class SubscriptionSerializer(serializers.ModelSerializer):
 
     def get_recipes_count(self, obj):
         return obj.recipes.count()
+
+
+class PantrySerializer(serializers.Serializer):
+    """Параметры подбора рецептов по имеющимся ингредиентам."""
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False)
+    missing = serializers.IntegerField(min_value=0, required=False)
+
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Выдача пары JWT-токенов с ролью пользователя."""
+
+    @classmethod
+    def get_token(cls, user):
+        return add_role_claims(super().get_token(user), user)
+
+
+class RoleTokenRefreshSerializer(TokenRefreshSerializer):
+    """Обновление access-токена с актуальной ролью пользователя."""
+
+    def validate(self, attrs):
+        refresh = RefreshToken(attrs['refresh'])
+        user = User.objects.filter(
+            pk=refresh[api_settings.USER_ID_CLAIM], is_active=True).first()
+        if user is None:
+            raise InvalidToken('Пользователь не найден или неактивен')
+        return super().validate(
+            {'refresh': str(add_role_claims(refresh, user))})
+
+
+class TokenBlacklistSerializer(serializers.Serializer):
+    """Отзыв refresh-токена."""
+    refresh = serializers.CharField()
+
+    def validate(self, attrs):
+        RefreshToken(attrs['refresh']).blacklist()
+        return {}
@@ -0,0 +1,51 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.deletion import recipes_deleted
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from recipes.signals import on_commit_once
+from recipes.transfer import recipes_imported
+from users.models import User
+from .cache import (invalidate_all, invalidate_author, invalidate_recipe,
+                    invalidate_recipes)
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def recipe_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        on_commit_once(invalidate_recipe, instance.pk)
+
+
+@receiver((recipes_deleted, recipes_imported))
+def recipes_batch_changed(sender, recipe_ids, **kwargs):
+    """Рецепты удалены или загружены порцией без сигналов моделей."""
+    on_commit_once(invalidate_recipes, tuple(recipe_ids))
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def recipe_ingredient_changed(sender, instance, **kwargs):
+    on_commit_once(invalidate_recipe, instance.recipe_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, reverse, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        on_commit_once(invalidate_all)
+    else:
+        on_commit_once(invalidate_recipe, instance.pk)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+@receiver((post_save, post_delete), sender=Ingredient)
+def catalog_changed(sender, **kwargs):
+    """Теги и ингредиенты входят в представления многих рецептов."""
+    on_commit_once(invalidate_all)
+
+
+@receiver(post_save, sender=User)
+def author_saved(sender, instance, **kwargs):
+    """Профиль автора входит в представления его рецептов."""
+    if instance.author_changed:
+        on_commit_once(invalidate_author, instance.pk)
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+import traceback
+
+from django.conf import settings
+from django.db import DatabaseError, NotSupportedError, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import metrics
+
+logger = logging.getLogger('foodgram.slow_queries')
+
+EXPLAINED_LIMIT = 1000
+PARAM_LENGTH = 200
+STACK_DEPTH = 5
+IN_LIST_RE = re.compile(r'\((?:%s, )+%s\)')
+NUMBER_RE = re.compile(r'\b\d+\b')
+SPACE_RE = re.compile(r'\s+')
+
+# Модули обработчиков execute_wrappers: их кадры не являются местом вызова.
+WRAPPER_FILES = {__file__, metrics.__file__}
+
+explained = set()
+state = threading.local()
+
+
+def fingerprint(sql):
+    """
+    Отпечаток запроса: списки IN любой длины и числовые литералы
+    (LIMIT, OFFSET) заменяются, поэтому одинаковые по структуре запросы
+    получают один отпечаток.
+    """
+    sql = IN_LIST_RE.sub('(...)', sql)
+    sql = SPACE_RE.sub(' ', NUMBER_RE.sub('?', sql))
+    return hashlib.sha1(sql.encode()).hexdigest()[:16]
+
+
+def call_site():
+    """Кадры кода проекта (без библиотек), начиная с ближайшего."""
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        f'{frame.filename[len(base_dir) + 1:]}:{frame.lineno} {frame.name}'
+        for frame in reversed(traceback.extract_stack())
+        if frame.filename.startswith(base_dir)
+        and frame.filename not in WRAPPER_FILES
+        and 'site-packages' not in frame.filename
+    ]
+    return frames[:STACK_DEPTH]
+
+
+def short_params(params):
+    if params is None:
+        return None
+    return [
+        param[:PARAM_LENGTH] if isinstance(param, str) else param
+        for param in params
+    ]
+
+
+def explain(connection, sql, params):
+    """
+    План запроса. EXPLAIN выполняется в точке сохранения, чтобы ошибка
+    не прервала транзакцию запроса; ANALYZE - только для SELECT.
+    """
+    options = {}
+    if settings.SLOW_QUERY_EXPLAIN_ANALYZE:
+        options['analyze'] = True
+    try:
+        prefix = connection.ops.explain_query_prefix(**options)
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(f'{prefix} {sql}', params)
+                return [' '.join(map(str, row)) for row in cursor.fetchall()]
+    except (DatabaseError, NotSupportedError, ValueError) as error:
+        return [f'EXPLAIN недоступен: {error}']
+
+
+def log_query(connection, sql, params, many, duration):
+    key = fingerprint(sql)
+    entry = {
+        'time': timezone.now().isoformat(),
+        'fingerprint': key,
+        'duration_ms': round(duration * 1000, 2),
+        'alias': connection.alias,
+        'sql': sql,
+        'params': None if many else short_params(params),
+        'stack': call_site(),
+    }
+    # Когда набор отпечатков заполнен, планы новых запросов не строятся:
+    # иначе EXPLAIN выполнялся бы для каждого медленного запроса.
+    if (key not in explained and len(explained) < EXPLAINED_LIMIT
+            and not many and sql.lstrip()[:6].upper() == 'SELECT'):
+        explained.add(key)
+        entry['plan'] = explain(connection, sql, params)
+    logger.warning(json.dumps(entry, ensure_ascii=False, default=str))
+
+
+def log_slow_query(execute, sql, params, many, context):
+    """
+    Запись в журнал медленных запросов: SQL, параметры, место вызова
+    и план (для каждого отпечатка - один раз за время жизни процесса).
+    Запросы, прерванные по statement_timeout, тоже попадают в журнал.
+    """
+    if getattr(state, 'active', False):
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        if duration * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+            state.active = True
+            try:
+                log_query(context['connection'], sql, params, many, duration)
+            finally:
+                state.active = False
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    if (settings.SLOW_QUERY_THRESHOLD_MS
+            and log_slow_query not in connection.execute_wrappers):
+        connection.execute_wrappers.append(log_slow_query)
@@ -0,0 +1,97 @@
+import logging
+
+from rest_framework.throttling import SimpleRateThrottle
+
+from .metrics import THROTTLE_REJECTED
+
+logger = logging.getLogger(__name__)
+
+
+class CostRateThrottle(SimpleRateThrottle):
+    """
+    Ограничение частоты запросов с учетом стоимости действия.
+    Стоимость действий задается во вьюсете атрибутом throttle_costs,
+    по умолчанию запрос стоит 1.
+    Счетчик скользящего окна хранится в кэше: учитываются текущее
+    окно и предыдущее, вклад которого пропорционален еще
+    не истекшей его части.
+    """
+    default_cost = 1
+
+    def get_cost(self, request, view):
+        costs = getattr(view, 'throttle_costs', {})
+        cost = costs.get(getattr(view, 'action', None), self.default_cost)
+        return min(cost, self.num_requests)
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        self.cost = self.get_cost(request, view)
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        current_key = f'{self.key}_{window}'
+        previous_key = f'{self.key}_{window - 1}'
+        counts = self.cache.get_many((current_key, previous_key))
+        self.current = counts.get(current_key, 0)
+        self.previous = counts.get(previous_key, 0)
+        self.elapsed = self.now - window * self.duration
+        used = (self.previous * (1 - self.elapsed / self.duration)
+                + self.current)
+        if used + self.cost > self.num_requests:
+            return self.throttle_failure(request, view)
+        if not self.cache.add(current_key, self.cost, 2 * self.duration):
+            self.cache.incr(current_key, self.cost)
+        return True
+
+    def throttle_failure(self, request, view):
+        action = getattr(view, 'action', None)
+        THROTTLE_REJECTED.labels(self.scope, action).inc()
+        logger.warning(
+            'Запрос ограничен: %s, действие %s, стоимость %s',
+            self.key, action, self.cost)
+        return False
+
+    def wait(self):
+        """Время, через которое запрос такой стоимости будет принят."""
+        budget = self.num_requests - self.cost
+        if self.current <= budget and self.previous:
+            # Достаточно дождаться, пока вклад предыдущего окна уменьшится.
+            wait = (self.duration * (1 - (budget - self.current)
+                                     / self.previous) - self.elapsed)
+        else:
+            # Текущее окно станет предыдущим, его вклад тоже должен
+            # уменьшиться.
+            wait = self.duration - self.elapsed
+            if self.current:
+                wait += max(
+                    0, self.duration * (1 - budget / self.current))
+        return max(wait, 0)
+
+
+class UserCostRateThrottle(CostRateThrottle):
+    """Ограничение для аутентифицированных пользователей."""
+    scope = 'user'
+
+    def get_cache_key(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return None
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': request.user.pk,
+        }
+
+
+class AnonCostRateThrottle(CostRateThrottle):
+    """Ограничение для анонимных запросов по IP-адресу."""
+    scope = 'anon'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request),
+        }
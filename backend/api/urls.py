@@ -1,8 +1,13 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from rest_framework_simplejwt.views import (TokenObtainPairView,
+                                            TokenRefreshView)
 
+from .serializers import (RoleTokenObtainPairSerializer,
+                          RoleTokenRefreshSerializer)
 from .views import (CustomUserViewSet, IngredientViewSet,
-                    RecipeViewSet, TagViewSet)
+                    RecipeViewSet, TagViewSet, TokenBlacklistView)
 
 
 router_v1 = DefaultRouter()
@@ -15,3 +20,12 @@ urlpatterns = [
     path('auth/', include('djoser.urls.authtoken')),
     path('', include(router_v1.urls)),
 ]
+
+if settings.AUTH_MODE == 'jwt':
+    urlpatterns += [
+        path('auth/jwt/create/', TokenObtainPairView.as_view(
+            serializer_class=RoleTokenObtainPairSerializer)),
+        path('auth/jwt/refresh/', TokenRefreshView.as_view(
+            serializer_class=RoleTokenRefreshSerializer)),
+        path('auth/jwt/blacklist/', TokenBlacklistView.as_view()),
+    ]
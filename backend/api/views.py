@@ -1,42 +1,102 @@
-import io
+import time
+from functools import partial
 
 from django.shortcuts import get_object_or_404
-from django.http import FileResponse
+from django.utils.functional import cached_property
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, StreamingHttpResponse
 from django.db.models import Sum
 from djoser.views import UserViewSet
 from django_filters.rest_framework import DjangoFilterBackend
-from django.conf import settings
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import serializers, status, viewsets
-from reportlab.lib import units, pagesizes
-from reportlab.pdfbase import pdfmetrics, ttfonts
-from reportlab.pdfgen import canvas
+from rest_framework_simplejwt.views import TokenViewBase
 
+from jobs.queue import enqueue_on_commit
 from users.models import User, Subscription
 from recipes.models import (Tag, Ingredient, Recipe, RecipeIngredient,
                             ShoppingCart, Favorite)
+from recipes.archive import spool_archive, user_archive
+from recipes.catalog import catalog_url
+from recipes.deletion import (deactivate_user, delete_recipes, delete_user,
+                              hide_recipes)
+from recipes.feed import feed_page
+from recipes.pantry import ingredient_index
+from recipes.popularity import POINTS, nudge
 from .serializers import (CustomUserSerializer, SubscriptionSerializer,
                           TagSerializer, IngredientSerializer,
                           BaseRecipeSerializer, RecipeReadSerializer,
-                          RecipeWriteSerializer)
+                          RecipeWriteSerializer, TokenBlacklistSerializer,
+                          PantrySerializer, requested_fields)
 from .permissions import IsAdminOrReadOnly, IsAuthorOrAdminOrReadOnly
-from .pagination import CustomPagination
+from .pagination import CustomPagination, FeedPagination
+from .cache import get_page, render_recipes, set_page
+from .fast_serializers import (recipe_rows, represent_recipes,
+                               represent_users, user_rows)
+from .metrics import PDF_RENDER_DURATION, PDF_SIZE
+from .pdf import shopping_list
 from .filters import RecipesFilter, IngredientSearch
 
+EXPORT_FILENAME = 'foodgram-export.zip'
 
-class CustomUserViewSet(UserViewSet):
+
+def export_file_response(file):
+    """Ответ с архивом пользователя из временного файла."""
+    return FileResponse(file, as_attachment=True, filename=EXPORT_FILENAME)
+
+
+class SparseFieldsViewMixin:
+    """
+    Вывод только запрошенных полей (параметры fields и omit)
+    для действий из sparse_actions. При fast_read = True списки
+    выводятся из строк values() без сериализаторов DRF
+    (api/fast_serializers.py).
+    """
+    sparse_actions = ('list', 'retrieve')
+    fast_read = False
+
+    @cached_property
+    def requested_fields(self):
+        return requested_fields(self.request, self.get_serializer_class())
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action in self.sparse_actions:
+            kwargs.setdefault('fields', self.requested_fields)
+        return super().get_serializer(*args, **kwargs)
+
+
+class CustomUserViewSet(SparseFieldsViewMixin, UserViewSet):
     """Действия с пользователями и подписками."""
     serializer_class = CustomUserSerializer
-    queryset = User.objects.all()
+    queryset = User.objects.order_by('pk')
     pagination_class = CustomPagination
+    throttle_costs = {'subscriptions': 5, 'export': 20}
+    sparse_actions = ('list', 'retrieve', 'me')
+    fast_read = True
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in self.sparse_actions:
+            return CustomUserSerializer.prepare_queryset(
+                queryset, self.request, self.requested_fields)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        if not self.fast_read:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(
+            user_rows(queryset, self.requested_fields))
+        return self.get_paginated_response(
+            represent_users(page, self.requested_fields))
 
     def get_permissions(self):
         """Выбор прав доступа для операции."""
         if self.action in (
             'me', 'retrieve', 'set_password',
-            'subscriptions', 'subscribe'
+            'subscriptions', 'subscribe', 'export'
         ):
             return (IsAuthenticated(),)
         if self.action in ('list', 'create'):
@@ -45,12 +105,36 @@ class CustomUserViewSet(UserViewSet):
             return (IsAdminOrReadOnly(),)
         return super().get_permissions()
 
+    def perform_destroy(self, instance):
+        """
+        Учетная запись отключается сразу, а рецепты и остальные
+        данные пользователя удаляются порциями в фоновой задаче.
+        """
+        deactivate_user(instance.pk)
+        enqueue_on_commit(delete_user, instance.pk)
+
     @action(['get'], detail=False)
     def me(self, request, *args, **kwargs):
         """Страница профиля текущего пользователя."""
         self.get_object = self.get_instance
         return self.retrieve(request, *args, **kwargs)
 
+    @action(['get'], detail=False)
+    def export(self, request):
+        """
+        Архив с рецептами, избранным, списком покупок и подписками
+        пользователя. Под ASGI Django 3.2 перебирает потоковый ответ
+        в цикле событий, где запросы к базе запрещены, поэтому архив
+        сначала записывается во временный файл (см. async_views.export).
+        """
+        if isinstance(request._request, ASGIRequest):
+            return export_file_response(spool_archive(request.user.pk))
+        response = StreamingHttpResponse(
+            user_archive(request.user.pk), content_type='application/zip')
+        response['Content-Disposition'] = (
+            f'attachment; filename="{EXPORT_FILENAME}"')
+        return response
+
     @action(['get'], detail=False)
     def subscriptions(self, request):
         """Список авторов, на которых подписан пользователь."""
@@ -113,24 +197,95 @@ class IngredientViewSet(viewsets.ModelViewSet):
     permission_classes = (IsAdminOrReadOnly,)
     pagination_class = None
 
+    @action(['get'], detail=False)
+    def catalog(self, request):
+        """
+        Перенаправление на неизменяемый снимок всего справочника:
+        клиент может кэшировать его и искать ингредиенты локально.
+        """
+        return Response(status=status.HTTP_302_FOUND, headers={
+            'Location': request.build_absolute_uri(catalog_url()),
+            'Cache-Control': 'no-cache',
+        })
+
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     """Действия с рецептами."""
     queryset = Recipe.objects.all()
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipesFilter
     pagination_class = CustomPagination
+    sparse_actions = ('list', 'retrieve', 'feed')
+    fast_read = True
+    throttle_costs = {
+        'download_shopping_cart': 20,
+        'create': 5,
+        'update': 5,
+        'partial_update': 5,
+        'pantry': 2,
+        'similar': 2,
+    }
+
+    def list(self, request, *args, **kwargs):
+        """
+        Список рецептов: id рецептов страницы и их представления
+        берутся из кэша, если он заполнен.
+        """
+        recipe_ids = get_page(request, self.paginator)
+        if recipe_ids is None:
+            queryset = self.filter_queryset(Recipe.objects.all())
+            recipe_ids = self.paginate_queryset(
+                queryset.values_list('pk', flat=True))
+            set_page(request, self.paginator, recipe_ids)
+        return self.get_paginated_response(render_recipes(
+            request, recipe_ids, self.requested_fields, self.fast_read))
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Страница рецепта из кэша представлений. Фрагмент удаленного
+        рецепта сбрасывается после фиксации удаления (api/signals.py),
+        поэтому база при попадании в кэш не читается.
+        """
+        try:
+            recipe_id = int(kwargs['pk'])
+        except ValueError:
+            raise Http404
+        results = render_recipes(
+            request, [recipe_id], self.requested_fields, self.fast_read)
+        if not results:
+            raise Http404
+        return Response(results[0])
+
+    def perform_destroy(self, instance):
+        """
+        Рецепт скрывается сразу, а его строки вместе со связанными
+        (избранное, списки покупок, ленты) удаляются порциями
+        в фоновой задаче.
+        """
+        hide_recipes([instance.pk])
+        enqueue_on_commit(delete_recipes, [instance.pk])
+
+    def represent(self, queryset, fields):
+        """Представления рецептов с полями fields в порядке queryset."""
+        queryset = RecipeReadSerializer.prepare_queryset(
+            queryset, self.request, fields)
+        if self.fast_read:
+            return represent_recipes(
+                recipe_rows(queryset, fields), fields, self.request)
+        return RecipeReadSerializer(
+            queryset, many=True, fields=fields,
+            context=self.get_serializer_context()).data
 
     def get_serializer_class(self):
         """Выбор сериализатора для действий по эндпойнту recipes."""
-        if self.action in ('list', 'retrieve'):
+        if self.action in ('list', 'retrieve', 'feed'):
             return RecipeReadSerializer
         return RecipeWriteSerializer
 
     def get_permissions(self):
         """Выбор прав доступа для операции."""
         if self.action in ('favorite', 'shopping_cart',
-                           'download_shopping_cart'):
+                           'download_shopping_cart', 'feed'):
             return (IsAuthenticated(),)
         return (IsAuthorOrAdminOrReadOnly(),)
 
@@ -140,6 +295,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
             raise serializers.ValidationError(
                 'Этот рецепт уже был добавлен ранее')
         model.objects.create(user=user, recipe=recipe)
+        nudge(recipe, POINTS[model])
         serializer = BaseRecipeSerializer(recipe)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -148,6 +304,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         obj = model.objects.filter(user=user, recipe=recipe)
         if obj:
             obj.delete()
+            nudge(recipe, -POINTS[model])
             return Response(status=status.HTTP_204_NO_CONTENT)
         raise serializers.ValidationError('Указанного рецепта нет в списке')
 
@@ -169,6 +326,51 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return self.add_object(*request_data)
         return self.delete_object(*request_data)
 
+    @action(['get'], detail=False)
+    def pantry(self, request):
+        """
+        Подбор рецептов по имеющимся ингредиентам: сначала рецепты,
+        для которых есть наибольшая доля ингредиентов.
+        """
+        params = PantrySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        matches = self.paginate_queryset(
+            ingredient_index.match(**params.validated_data))
+        recipes = {
+            data['id']: data for data in self.represent(
+                Recipe.objects.filter(
+                    pk__in=[match.recipe_id for match in matches]),
+                RecipeReadSerializer.Meta.fields)
+        }
+        results = []
+        for match in matches:
+            if match.recipe_id not in recipes:
+                continue
+            data = recipes[match.recipe_id]
+            data['matched_ingredients'] = match.matched
+            data['missing_ingredients'] = match.total - match.matched
+            results.append(data)
+        return self.get_paginated_response(results)
+
+    @action(['get'], detail=False)
+    def feed(self, request):
+        """Новые рецепты авторов, на которых подписан пользователь."""
+        paginator = FeedPagination()
+        recipe_ids = paginator.paginate(
+            request, partial(feed_page, request.user.id))
+        return paginator.get_paginated_response(render_recipes(
+            request, recipe_ids, self.requested_fields, self.fast_read))
+
+    @action(['get'], detail=True)
+    def similar(self, request, pk):
+        """Похожие рецепты по ингредиентам и тегам."""
+        recipe = get_object_or_404(Recipe, pk=pk)
+        recipes = Recipe.objects.filter(
+            similar_to__recipe=recipe).order_by('-similar_to__score')
+        serializer = BaseRecipeSerializer(
+            recipes, many=True, context={'request': request})
+        return Response(serializer.data)
+
     @action(['get'], detail=False)
     def download_shopping_cart(self, request):
         """Скачивание PDF-файла со списком покупок"""
@@ -177,25 +379,20 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 'ingredient__name', 'ingredient__measurement_unit').annotate(
                     quantity=Sum('amount'))
         if products_to_buy:
-            buffer = io.BytesIO()
-            font_path = settings.FONT_PATH
-            pdfmetrics.registerFont(ttfonts.TTFont('Arial', font_path))
-            template = canvas.Canvas(buffer, pagesize=pagesizes.A4, bottomup=0)
-            textobject = template.beginText()
-            textobject.setTextOrigin(2 * units.cm, 2 * units.cm)
-            textobject.setFont("Arial", 14)
-            textobject.textLine('СПИСОК ПОКУПОК:')
-            textobject.moveCursor(0, 14)
-            for product in products_to_buy:
-                item = (f"{product['ingredient__name']} "
-                        f"({product['ingredient__measurement_unit']}) - "
-                        f"{product['quantity']}")
-                textobject.textLine(item)
-            template.drawText(textobject)
-            template.showPage()
-            template.save()
-            buffer.seek(0)
+            started = time.perf_counter()
+            buffer = shopping_list(products_to_buy)
+            PDF_RENDER_DURATION.observe(time.perf_counter() - started)
+            PDF_SIZE.observe(buffer.getbuffer().nbytes)
             return FileResponse(
                 buffer, as_attachment=True, filename='shopping-list.pdf')
         raise serializers.ValidationError(
             'Сначала добавьте рецепты в список покупок')
+
+
+class TokenBlacklistView(TokenViewBase):
+    """Отзыв refresh-токена."""
+    serializer_class = TokenBlacklistSerializer
+
+    def post(self, request, *args, **kwargs):
+        super().post(request, *args, **kwargs)
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -1,3 +1,5 @@
+from datetime import timedelta
+from importlib.util import find_spec
 from pathlib import Path
 import os
 
@@ -28,13 +30,16 @@ INSTALLED_APPS = [
     'rest_framework',
     'django_filters',
     'rest_framework.authtoken',
+    'rest_framework_simplejwt.token_blacklist',
     'djoser',
     'users.apps.UsersConfig',
     'recipes.apps.RecipesConfig',
     'api.apps.ApiConfig',
+    'jobs.apps.JobsConfig',
 ]
 
 MIDDLEWARE = [
+    'api.metrics.metrics_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -44,7 +49,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'foodgram.urls'
+ROOT_URLCONF = os.getenv('ROOT_URLCONF', default='foodgram.urls')
 
 TEMPLATES = [
     {
@@ -81,6 +86,21 @@ DATABASES = {
 }
 
 
+# Cache
+# Локальный кэш подходит только для одного процесса. С несколькими воркерами
+# gunicorn или с воркером фоновых задач нужен общий кэш (проверка recipes.E001),
+# в infra/docker-compose.yml - memcached:
+# CACHE_BACKEND=django.core.cache.backends.memcached.PyMemcacheCache
+# CACHE_LOCATION=cache:11211
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default=''),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -132,16 +152,106 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'users.User'
 
+# token - только токены DRF из таблицы authtoken;
+# jwt - подписанные JWT-токены, старые токены DRF продолжают работать.
+AUTH_MODE = os.getenv('AUTH_MODE', default='token')
+
+AUTHENTICATION_CLASSES = ['rest_framework.authentication.TokenAuthentication']
+if AUTH_MODE == 'jwt':
+    AUTHENTICATION_CLASSES.insert(
+        0, 'api.authentication.StatelessJWTAuthentication')
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
 
-    'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+    'DEFAULT_AUTHENTICATION_CLASSES': AUTHENTICATION_CLASSES,
+    # orjson необязателен: без него используется стандартный рендерер.
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer' if find_spec('orjson')
+        else 'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 6,
+
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.UserCostRateThrottle',
+        'api.throttling.AnonCostRateThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'user': os.getenv('THROTTLE_USER_RATE', default='600/min'),
+        'anon': os.getenv('THROTTLE_ANON_RATE', default='300/min'),
+    },
+    # Перед приложением стоит nginx: адрес клиента берется из последнего
+    # адреса X-Forwarded-For, подставленные клиентом адреса игнорируются.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', default=1)),
+}
+
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(
+        minutes=int(os.getenv('JWT_ACCESS_MINUTES', default=5))),
+    'REFRESH_TOKEN_LIFETIME': timedelta(
+        days=int(os.getenv('JWT_REFRESH_DAYS', default=7))),
+    'ROTATE_REFRESH_TOKENS': True,
+    'BLACKLIST_AFTER_ROTATION': True,
+    'AUTH_HEADER_TYPES': ('Bearer',),
+}
+
+# Размер ленты подписок и число подписчиков, начиная с которого
+# рецепты автора не раскладываются по лентам, а добавляются при чтении.
+FEED_SIZE = int(os.getenv('FEED_SIZE', default=500))
+FEED_POPULAR_AUTHOR_FOLLOWERS = int(
+    os.getenv('FEED_POPULAR_AUTHOR_FOLLOWERS', default=1000))
+
+# Прогрев процесса при загрузке приложения (foodgram/warmup.py).
+WARMUP = os.getenv('WARMUP', default='True') == 'True'
+
+# Журнал медленных запросов: порог в миллисекундах (0 - журнал выключен).
+# Записи в формате JSON, по одной на строку; сводка - slow_query_report.
+SLOW_QUERY_THRESHOLD_MS = int(os.getenv('SLOW_QUERY_THRESHOLD_MS', default=0))
+SLOW_QUERY_EXPLAIN_ANALYZE = (
+    os.getenv('SLOW_QUERY_EXPLAIN_ANALYZE', default='False') == 'True')
+SLOW_QUERY_LOG = os.getenv(
+    'SLOW_QUERY_LOG', default=str(BASE_DIR / 'slow_queries.log'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+        # Файл пишут все воркеры gunicorn, поэтому ротацию выполняет
+        # logrotate, а обработчик открывает файл заново после нее.
+        'slow_queries': {
+            'class': 'logging.handlers.WatchedFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'delay': True,
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'foodgram.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+        'foodgram.warmup': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'recipes.deletion': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
 }
 
 DJOSER = {
@@ -0,0 +1,73 @@
+"""
+Прогрев процесса перед обработкой запросов: загрузка шрифта и reportlab,
+индекса ингредиентов, метаданных моделей и сериализаторов, URL-резолвера.
+При запуске gunicorn с preload_app прогрев выполняется в мастер-процессе
+до fork, и воркеры получают подготовленную память в режиме copy-on-write.
+"""
+import logging
+import os
+import resource
+import time
+
+from django.apps import apps
+from django.core.cache import caches
+from django.db import DatabaseError, connections
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def rss_bytes():
+    """Текущий размер резидентной памяти процесса."""
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        # Вне Linux доступен только максимум за время жизни процесса.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def load_models():
+    """Кэши _meta моделей и поля сериализаторов чтения."""
+    from api.serializers import (CustomUserSerializer, IngredientSerializer,
+                                 RecipeReadSerializer, TagSerializer)
+
+    for model in apps.get_models():
+        model._meta.get_fields()
+    for serializer_class in (CustomUserSerializer, IngredientSerializer,
+                             RecipeReadSerializer, TagSerializer):
+        serializer_class().fields
+
+
+def load_data():
+    """Индекс ингредиентов, снимок справочника и список тегов."""
+    from api.serializers import TagSerializer
+    from recipes.catalog import catalog_url
+    from recipes.models import Tag
+    from recipes.pantry import ingredient_index
+
+    ingredient_index.refresh()
+    catalog_url()
+    TagSerializer(Tag.objects.all(), many=True).data
+
+
+def warm_up():
+    from api.pdf import register_font
+
+    started = time.perf_counter()
+    get_resolver().reverse_dict
+    register_font()
+    load_models()
+    try:
+        load_data()
+    except DatabaseError as error:
+        # База еще не готова (например, до выполнения migrate).
+        logger.warning('Прогрев без данных из базы: %s', error)
+    finally:
+        # Соединения не должны достаться воркерам после fork.
+        connections.close_all()
+        for cache in caches.all():
+            cache.close()
+    logger.info(
+        'Прогрев за %.2f с, RSS %.0f МБ',
+        time.perf_counter() - started, rss_bytes() / 2 ** 20)
@@ -0,0 +1,68 @@
+import os
+import shutil
+import time
+
+# Приложение загружается и прогревается в мастер-процессе до fork
+# (foodgram/warmup.py), воркеры разделяют его память.
+preload_app = os.getenv('GUNICORN_PRELOAD', default='True') == 'True'
+
+STARTED = time.monotonic()
+
+# Метрики воркеров собираются через файлы в общем каталоге. Переменная
+# задается только для gunicorn: процессы manage.py и run_worker хранят
+# метрики в памяти и не оставляют файлов в каталоге воркеров.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus')
+
+
+def on_starting(server):
+    """
+    Очистка файлов метрик, оставшихся от предыдущего запуска
+    (и от мастер-процесса, который запросы не обрабатывает).
+    """
+    path = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+
+
+def child_exit(server, worker):
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def when_ready(server):
+    """
+    Проверка перед запуском воркеров: с несколькими воркерами кэш
+    должен быть общим, иначе они не видят изменений друг друга.
+    С preload_app приложение уже загружено, и здесь же, до fork,
+    выполняется прогрев: воркеры получают подготовленную память.
+    """
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+        django.setup()
+    from django.conf import settings
+    from recipes.checks import shared_cache_errors
+
+    errors = shared_cache_errors(server.num_workers)
+    for error in errors:
+        server.log.error('%s %s', error.msg, error.hint)
+    if errors:
+        raise SystemExit(1)
+    if server.cfg.preload_app and settings.WARMUP:
+        from foodgram.warmup import warm_up
+        warm_up()
+    server.log.info('Сервер запущен за %.2f с', time.monotonic() - STARTED)
+
+
+def post_worker_init(worker):
+    """Учет воркера: время запуска для метрик и размер памяти."""
+    from api.metrics import WORKER_START_TIME
+    from foodgram.warmup import rss_bytes
+
+    WORKER_START_TIME.set_to_current_time()
+    worker.log.info(
+        'Воркер %s готов, RSS %.0f МБ', worker.pid, rss_bytes() / 2 ** 20)
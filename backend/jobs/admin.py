@@ -0,0 +1,20 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'id', 'task', 'status', 'attempts', 'run_at', 'created')
+    list_filter = ('status', 'task')
+    ordering = ('-id',)
+    readonly_fields = ('started', 'heartbeat', 'created', 'error')
+    actions = ('retry',)
+    show_full_result_count = False
+
+    @admin.action(description='Повторить выбранные задачи')
+    def retry(self, request, queryset):
+        queryset.update(
+            status=Job.QUEUED, attempts=0, run_at=timezone.now(), error='')
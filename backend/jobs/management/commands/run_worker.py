@@ -0,0 +1,39 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.queue import Worker
+from recipes.checks import shared_cache_errors
+
+
+class Command(BaseCommand):
+    help = 'Выполнение фоновых задач из очереди в базе данных'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=2,
+            help='Количество потоков, выполняющих задачи')
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза при пустой очереди, секунды')
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Завершиться, когда очередь опустеет')
+
+    def handle(self, *args, **options):
+        # Задачи меняют рецепты: изменения в кэше должны увидеть
+        # процессы приложения.
+        errors = shared_cache_errors(2)
+        if errors:
+            raise CommandError(f'{errors[0].msg} {errors[0].hint}')
+        worker = Worker(
+            options['concurrency'], options['poll_interval'],
+            options['burst'])
+        signal.signal(signal.SIGTERM, worker.stop)
+        signal.signal(signal.SIGINT, worker.stop)
+        started = time.monotonic()
+        worker.start()
+        self.stdout.write(
+            f'Выполнено задач: {worker.processed}, с ошибкой: '
+            f'{worker.failed} за {time.monotonic() - started:.1f} с')
@@ -0,0 +1,38 @@
+# Generated by Django 3.2.18 on 2026-10-19 08:37
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.CharField(max_length=200, verbose_name='Задача')),
+                ('args', models.JSONField(default=list, verbose_name='Аргументы')),
+                ('status', models.CharField(choices=[('queued', 'В очереди'), ('running', 'Выполняется'), ('failed', 'Ошибка')], default='queued', max_length=7, verbose_name='Состояние')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Попытки')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=5, verbose_name='Максимум попыток')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Время запуска')),
+                ('started', models.DateTimeField(blank=True, null=True, verbose_name='Начало выполнения')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+            ],
+            options={
+                'verbose_name': 'Фоновая задача',
+                'verbose_name_plural': 'Фоновые задачи',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('status', 'queued')), fields=['run_at'], name='job_queued_run_at'),
+        ),
+    ]
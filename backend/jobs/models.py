@@ -0,0 +1,76 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    Фоновая задача: функция (путь для импорта) и ее аргументы.
+    Выполненные задачи удаляются, неудачные остаются для разбора.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    task = models.CharField(
+        max_length=200,
+        verbose_name='Задача',
+    )
+    args = models.JSONField(
+        default=list,
+        verbose_name='Аргументы',
+    )
+    status = models.CharField(
+        max_length=7,
+        choices=STATUS_CHOICES,
+        default=QUEUED,
+        verbose_name='Состояние',
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попытки',
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        default=5,
+        verbose_name='Максимум попыток',
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Время запуска',
+    )
+    started = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Начало выполнения',
+    )
+    heartbeat = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Последняя отметка воркера',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания',
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name='Ошибка',
+    )
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = (
+            models.Index(
+                fields=('run_at',),
+                condition=models.Q(status='queued'),
+                name='job_queued_run_at',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.task}{tuple(self.args)}'
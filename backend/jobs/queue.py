@@ -0,0 +1,217 @@
+import logging
+import random
+import threading
+import traceback
+from datetime import timedelta
+
+from django.db import (DatabaseError, close_old_connections, connections,
+                       transaction)
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_BASE = 10
+BACKOFF_MAX = 60 * 60
+# Воркер отмечает выполняемые задачи раз в HEARTBEAT_INTERVAL секунд.
+# Задача без отметки дольше STALE_AFTER считается брошенной: ее воркер
+# завершился аварийно.
+HEARTBEAT_INTERVAL = 60
+STALE_AFTER = timedelta(minutes=5)
+STALE_ERROR = 'Воркер остановился во время выполнения задачи'
+
+
+def task_name(func):
+    name = f'{func.__module__}.{func.__qualname__}'
+    if '<' in name:
+        raise ValueError(f'Задачей может быть только функция модуля: {name}')
+    return name
+
+
+def enqueue(func, *args, delay=0, max_attempts=5):
+    """
+    Постановка задачи в очередь. Запись создается в текущей транзакции,
+    поэтому воркер увидит задачу только после ее фиксации.
+    """
+    return Job.objects.create(
+        task=task_name(func), args=list(args), max_attempts=max_attempts,
+        run_at=timezone.now() + timedelta(seconds=delay))
+
+
+def enqueue_many(func, args_list, max_attempts=5):
+    """Постановка задач func с разными аргументами одним запросом."""
+    run_at = timezone.now()
+    return Job.objects.bulk_create(
+        Job(task=task_name(func), args=list(args),
+            max_attempts=max_attempts, run_at=run_at)
+        for args in args_list)
+
+
+def enqueue_on_commit(func, *args, **options):
+    """Постановка задачи после фиксации транзакции."""
+    transaction.on_commit(lambda: enqueue(func, *args, **options))
+
+
+def backoff(attempts):
+    """Задержка перед повтором: экспонента со случайным разбросом."""
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    return timedelta(seconds=delay * random.uniform(0.5, 1.5))
+
+
+def claim(limit=1):
+    """
+    Захват готовых к выполнению задач. SKIP LOCKED позволяет воркерам
+    забирать разные задачи, не ожидая блокировок друг друга.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(Job.objects.select_for_update(skip_locked=True).filter(
+            status=Job.QUEUED, run_at__lte=now).order_by('run_at')[:limit])
+        Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=Job.RUNNING, attempts=F('attempts') + 1, started=now,
+            heartbeat=now)
+    for job in jobs:
+        job.attempts += 1
+    return jobs
+
+
+def run(job):
+    """Выполнение задачи; при ошибке - повтор с задержкой или отказ."""
+    try:
+        import_string(job.task)(*job.args)
+    except Exception:
+        logger.exception('Ошибка задачи %s (%s)', job.pk, job)
+        failed = job.attempts >= job.max_attempts
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.FAILED if failed else Job.QUEUED,
+            run_at=timezone.now() + backoff(job.attempts),
+            error=traceback.format_exc())
+        return False
+    Job.objects.filter(pk=job.pk).delete()
+    return True
+
+
+def heartbeat(job_ids):
+    """Отметка о том, что задачи еще выполняются."""
+    return Job.objects.filter(pk__in=job_ids, status=Job.RUNNING).update(
+        heartbeat=timezone.now())
+
+
+def requeue_stale(stale_after=STALE_AFTER):
+    """
+    Возврат в очередь задач, воркер которых завершился аварийно:
+    живой воркер обновляет отметку, сколько бы ни шла задача.
+    Попытка уже учтена при захвате, поэтому задача, исчерпавшая
+    попытки (например, каждый раз роняющая воркер по памяти),
+    остается в состоянии «Ошибка».
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status=Job.RUNNING, heartbeat__lt=now - stale_after)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, error=STALE_ERROR)
+    return failed + stale.update(status=Job.QUEUED, run_at=now)
+
+
+def run_pending(limit=None):
+    """Выполнение всех готовых задач в текущем потоке (для тестов)."""
+    count = 0
+    while limit is None or count < limit:
+        jobs = claim()
+        if not jobs:
+            return count
+        run(jobs[0])
+        count += 1
+    return count
+
+
+class Worker:
+    """
+    Воркер с concurrency потоками. Каждый поток забирает задачи
+    по одной; при пустой очереди ждет poll_interval секунд. Отдельный
+    поток отмечает выполняемые задачи и возвращает в очередь задачи
+    остановившихся воркеров.
+    """
+
+    def __init__(self, concurrency=1, poll_interval=1.0, burst=False):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.burst = burst
+        self.stopping = threading.Event()
+        self.processed = 0
+        self.failed = 0
+        self.running = set()
+        self.lock = threading.Lock()
+
+    def stop(self, *args):
+        self.stopping.set()
+
+    def step(self):
+        """Выполнение одной задачи; False, если очередь пуста."""
+        close_old_connections()
+        jobs = claim()
+        if not jobs:
+            return False
+        with self.lock:
+            self.running.add(jobs[0].pk)
+        try:
+            ok = run(jobs[0])
+        finally:
+            with self.lock:
+                self.running.discard(jobs[0].pk)
+        with self.lock:
+            self.processed += 1
+            self.failed += not ok
+        return True
+
+    def beat(self):
+        """Обновление отметок своих задач и возврат брошенных задач."""
+        with self.lock:
+            running = list(self.running)
+        if running:
+            heartbeat(running)
+        requeue_stale()
+
+    def beat_loop(self):
+        try:
+            while not self.stopping.wait(HEARTBEAT_INTERVAL):
+                try:
+                    self.beat()
+                except DatabaseError:
+                    logger.exception('Ошибка базы данных в воркере')
+                    connections.close_all()
+        finally:
+            connections.close_all()
+
+    def loop(self):
+        try:
+            while not self.stopping.is_set():
+                try:
+                    if self.step():
+                        continue
+                    if self.burst:
+                        return
+                except DatabaseError:
+                    logger.exception('Ошибка базы данных в воркере')
+                    connections.close_all()
+                self.stopping.wait(self.poll_interval)
+        finally:
+            connections.close_all()
+
+    def start(self):
+        requeue_stale()
+        beat = threading.Thread(target=self.beat_loop, name='worker-beat')
+        threads = [
+            threading.Thread(target=self.loop, name=f'worker-{number}')
+            for number in range(self.concurrency)
+        ]
+        beat.start()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.stopping.set()
+        beat.join()
@@ -1,5 +1,7 @@
 from django.contrib import admin
+from django.db.models import Count
 
+from .documents import rebuild_documents
 from .models import (Recipe, Ingredient, RecipeIngredient,
                      Tag, ShoppingCart, Favorite)
 
@@ -7,40 +9,55 @@ from .models import (Recipe, Ingredient, RecipeIngredient,
 class RecipeIngredientInline(admin.TabularInline):
     model = RecipeIngredient
     extra = 1
+    autocomplete_fields = ('ingredient',)
 
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
     inlines = (RecipeIngredientInline,)
-    list_display = ('name', 'author')
-    list_filter = ('author', 'name', 'tags')
-    search_fields = ('name',)
+    list_display = ('name', 'author', 'pub_date', 'in_favorite_count')
+    list_select_related = ('author',)
+    list_filter = ('tags',)
+    search_fields = ('name', 'author__username')
     fields = (
         'name', 'text', 'image', 'cooking_time', 'author',
         'tags', 'pub_date', 'in_favorite_count'
     )
-    filter_horizontal = ('ingredients', 'tags')
+    autocomplete_fields = ('author', 'tags')
     readonly_fields = ('pub_date', 'in_favorite_count')
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            favorite_count=Count('favorite_recipe'))
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        rebuild_documents([form.instance.pk])
 
-    @admin.display(description='Добавления в избранное')
+    @admin.display(description='Добавления в избранное',
+                   ordering='favorite_count')
     def in_favorite_count(self, obj):
-        return obj.favorite_recipe.count()
+        return obj.favorite_count
 
 
 @admin.register(Ingredient)
 class IngredientAdmin(admin.ModelAdmin):
     list_display = ('name', 'measurement_unit')
-    list_filter = ('name',)
+    list_filter = ('measurement_unit',)
     search_fields = ('name',)
     ordering = ('name',)
+    show_full_result_count = False
 
 
 @admin.register(RecipeIngredient)
 class RecipeIngredientAdmin(admin.ModelAdmin):
     list_display = ('recipe', 'ingredient', 'amount')
-    list_filter = ('recipe', 'ingredient')
+    list_select_related = ('recipe', 'ingredient')
     search_fields = ('recipe__name', 'ingredient__name',)
+    autocomplete_fields = ('recipe', 'ingredient')
     ordering = ('recipe__id',)
+    show_full_result_count = False
 
 
 @admin.register(Tag)
@@ -53,6 +70,8 @@ class TagAdmin(admin.ModelAdmin):
 @admin.register(ShoppingCart, Favorite)
 class SelectedRecipesAdmin(admin.ModelAdmin):
     list_display = ('user', 'recipe')
-    list_filter = ('user',)
+    list_select_related = ('user', 'recipe')
     search_fields = ('user__username', 'recipe__name')
+    autocomplete_fields = ('user', 'recipe')
     ordering = ('user__id', 'recipe__name')
+    show_full_result_count = False
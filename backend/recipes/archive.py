@@ -0,0 +1,128 @@
+import json
+import tempfile
+import zipfile
+
+from users.models import Subscription, User
+from .media import image_storage
+from .models import Favorite, Recipe, ShoppingCart
+from .transfer import MEDIA_DIR, RECORDS_FILE, recipe_records
+
+CHUNK_SIZE = 64 * 1024
+ITERATOR_CHUNK_SIZE = 1000
+
+
+class StreamBuffer:
+    """
+    Файл без поиска, в который пишет ZipFile: записанные байты
+    забираются порциями и сразу отдаются клиенту.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        try:
+            return b''.join(self.chunks)
+        finally:
+            self.chunks = []
+            self.size = 0
+
+
+def profile_records(user_id):
+    yield User.objects.filter(pk=user_id).values(
+        'email', 'username', 'first_name', 'last_name').get()
+
+
+def recipe_link_records(model, user_id):
+    """Рецепты из избранного или списка покупок: id, название и автор."""
+    rows = model.objects.filter(user=user_id).order_by('pk').values_list(
+        'recipe_id', 'recipe__name', 'recipe__author__email')
+    for recipe_id, name, author in rows.iterator(ITERATOR_CHUNK_SIZE):
+        yield {'recipe': recipe_id, 'name': name, 'author': author}
+
+
+def subscription_records(user_id):
+    rows = Subscription.objects.filter(user=user_id).order_by(
+        'pk').values_list('author__email', 'author__username')
+    for email, username in rows.iterator(ITERATOR_CHUNK_SIZE):
+        yield {'email': email, 'username': username}
+
+
+def user_files(user_id):
+    """Файлы NDJSON архива пользователя и источники их записей."""
+    return (
+        ('user.ndjson', profile_records(user_id)),
+        (RECORDS_FILE, recipe_records(
+            queryset=Recipe.objects.filter(author=user_id))),
+        ('favorites.ndjson', recipe_link_records(Favorite, user_id)),
+        ('shopping_cart.ndjson', recipe_link_records(ShoppingCart, user_id)),
+        ('subscriptions.ndjson', subscription_records(user_id)),
+    )
+
+
+def write_records(archive, buffer, name, records):
+    """
+    Размер файла заранее неизвестен, поэтому заголовок сразу
+    пишется в формате ZIP64: иначе файл больше 2 ГБ не запишется.
+    """
+    with archive.open(name, 'w', force_zip64=True) as file:
+        for record in records:
+            file.write(json.dumps(record, ensure_ascii=False).encode() + b'\n')
+            if buffer.size >= CHUNK_SIZE:
+                yield buffer.pop()
+
+
+def write_image(archive, buffer, name):
+    """Изображения уже сжаты, поэтому сохраняются без сжатия."""
+    info = zipfile.ZipInfo(f'{MEDIA_DIR}/{name}')
+    info.compress_type = zipfile.ZIP_STORED
+    with image_storage.open(name) as source, archive.open(
+            info, 'w', force_zip64=True) as file:
+        for data in iter(lambda: source.read(CHUNK_SIZE), b''):
+            file.write(data)
+            yield buffer.pop()
+
+
+def user_archive(user_id):
+    """
+    ZIP-архив с данными пользователя, отдаваемый порциями байтов.
+    Записи читаются из базы итераторами, поэтому память не зависит
+    от числа рецептов. Рецепты и изображения лежат в формате
+    export_recipes и могут быть загружены командой import_recipes.
+    """
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, records in user_files(user_id):
+            yield from write_records(archive, buffer, name, records)
+        images = Recipe.objects.filter(author=user_id).exclude(
+            image='').order_by('image').values_list(
+                'image', flat=True).distinct()
+        for name in images.iterator(ITERATOR_CHUNK_SIZE):
+            if image_storage.exists(name):
+                yield from write_image(archive, buffer, name)
+    yield buffer.pop()
+
+
+def spool_archive(user_id):
+    """
+    Архив пользователя, целиком записанный во временный файл.
+    Запись занимает время и место на диске пропорционально
+    размеру архива, ответ начинается только после нее.
+    """
+    file = tempfile.TemporaryFile()
+    try:
+        file.writelines(user_archive(user_id))
+    except BaseException:
+        file.close()
+        raise
+    file.seek(0)
+    return file
@@ -0,0 +1,134 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .models import Ingredient
+
+CATALOG_DIR = 'catalog'
+# Версия актуального снимка хранится в файле рядом со снимками,
+# кэш только сокращает чтения этого файла.
+CURRENT_FILE = f'{CATALOG_DIR}/current'
+VERSION_KEY = 'ingredient_catalog_version'
+VERSION_TIMEOUT = 60
+# Замененные снимки хранятся, пока их могут докачивать клиенты.
+STALE_AFTER = timedelta(days=1)
+
+
+def snapshot_name(version):
+    return f'{CATALOG_DIR}/ingredients.{version}.json'
+
+
+def compress(data):
+    """Сжатие без отметки времени: одинаковые данные дают один файл."""
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', mtime=0) as file:
+        file.write(data)
+    return buffer.getvalue()
+
+
+def write_atomic(name, data):
+    """
+    Запись файла через временный файл в том же каталоге: читатели
+    видят либо старое содержимое, либо новое целиком. Одновременная
+    запись одного снимка несколькими процессами безопасна.
+    """
+    path = default_storage.path(name)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=directory, delete=False) as file:
+        file.write(data)
+    try:
+        os.chmod(file.name, settings.FILE_UPLOAD_PERMISSIONS or 0o644)
+        os.replace(file.name, path)
+    except OSError:
+        os.remove(file.name)
+        raise
+
+
+def read_current():
+    """Версия из файла CURRENT_FILE, None - снимков еще нет."""
+    try:
+        with default_storage.open(CURRENT_FILE) as file:
+            return file.read().decode()
+    except FileNotFoundError:
+        return None
+
+
+def mark_superseded(version):
+    """
+    Время изменения замененного снимка - момент замены: от него
+    remove_stale отсчитывает срок хранения, поэтому клиенты, только
+    что перенаправленные на снимок, успеют его загрузить.
+    """
+    name = snapshot_name(version)
+    for path in (name, f'{name}.gz'):
+        try:
+            os.utime(default_storage.path(path))
+        except FileNotFoundError:
+            pass
+
+
+def remove_stale(version):
+    if not default_storage.exists(CATALOG_DIR):
+        return
+    now = timezone.now()
+    for name in default_storage.listdir(CATALOG_DIR)[1]:
+        path = f'{CATALOG_DIR}/{name}'
+        modified = default_storage.get_modified_time(path)
+        if (version not in name and path != CURRENT_FILE
+                and now - modified > STALE_AFTER):
+            default_storage.delete(path)
+
+
+def build_catalog():
+    """
+    Снимок справочника ингредиентов в JSON и его сжатая копия.
+    Версия снимка - хеш содержимого, поэтому файл по одному адресу
+    никогда не меняется.
+    """
+    data = json.dumps(
+        list(Ingredient.objects.order_by('pk').values(
+            'id', 'name', 'measurement_unit')),
+        ensure_ascii=False, separators=(',', ':'),
+    ).encode()
+    version = hashlib.sha256(data).hexdigest()[:16]
+    name = snapshot_name(version)
+    if not default_storage.exists(name):
+        write_atomic(f'{name}.gz', compress(data))
+        write_atomic(name, data)
+    previous = read_current()
+    write_atomic(CURRENT_FILE, version.encode())
+    if previous and previous != version:
+        mark_superseded(previous)
+    remove_stale(version)
+    cache.set(VERSION_KEY, version, VERSION_TIMEOUT)
+    return version
+
+
+def current_version():
+    """
+    Версия актуального снимка. Снимки удаляются не раньше чем через
+    STALE_AFTER после замены, поэтому версия из кэша ведет
+    на существующий файл.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = read_current()
+        if version is None:
+            return build_catalog()
+        cache.set(VERSION_KEY, version, VERSION_TIMEOUT)
+    return version
+
+
+def catalog_url():
+    """Адрес актуального снимка; при необходимости снимок строится."""
+    return default_storage.url(snapshot_name(current_version()))
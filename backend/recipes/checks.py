@@ -0,0 +1,32 @@
+import os
+
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Кэши, содержимое которых видно только одному процессу.
+LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def shared_cache_errors(processes):
+    """
+    Журнал изменений индекса подбора, версии кэша рецептов и счетчики
+    ограничения запросов работают, только если кэш общий для всех
+    processes процессов приложения.
+    """
+    backend = settings.CACHES['default']['BACKEND']
+    if processes <= 1 or backend not in LOCAL_CACHES:
+        return []
+    return [Error(
+        f'Кэш {backend} не разделяется между процессами ({processes}).',
+        hint='Укажите общий кэш в CACHE_BACKEND и CACHE_LOCATION, например '
+             'memcached из infra/docker-compose.yml.',
+        id='recipes.E001',
+    )]
+
+
+@register(Tags.caches)
+def shared_cache_check(app_configs, **kwargs):
+    return shared_cache_errors(int(os.getenv('WEB_CONCURRENCY', default=1)))
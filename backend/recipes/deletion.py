@@ -0,0 +1,160 @@
+import logging
+from functools import partial
+
+from django.db import transaction
+from django.db.models.deletion import Collector
+from django.dispatch import Signal
+from rest_framework.authtoken.models import Token
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken, OutstandingToken)
+
+from users.models import Subscription, User
+from .media import delete_unreferenced
+from .models import (Favorite, FeedEntry, Recipe, RecipeIngredient,
+                     ShoppingCart, SimilarRecipe)
+from .pantry import publish_change
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+RECIPE_BATCH_SIZE = 100
+
+# Отправляется, когда рецепты скрыты перед удалением и после удаления
+# порции рецептов, аргумент recipe_ids.
+# Получатель в api сбрасывает кэш рецептов; из воркера сброс виден
+# приложению, потому что run_worker работает только с общим кэшем
+# (проверка recipes.E001).
+recipes_deleted = Signal()
+
+RECIPE_RELATIONS = (
+    (RecipeIngredient, 'recipe'),
+    (Recipe.tags.through, 'recipe'),
+    (Favorite, 'recipe'),
+    (ShoppingCart, 'recipe'),
+    (FeedEntry, 'recipe'),
+    (SimilarRecipe, 'recipe'),
+    (SimilarRecipe, 'similar'),
+)
+USER_RELATIONS = (
+    (Favorite, 'user'),
+    (ShoppingCart, 'user'),
+    (FeedEntry, 'user'),
+    (Subscription, 'user'),
+    (Subscription, 'author'),
+    (Token, 'user'),
+    (BlacklistedToken, 'token__user'),
+    (OutstandingToken, 'user'),
+)
+
+
+def delete_batches(queryset, batch_size=BATCH_SIZE):
+    """
+    Удаление строк порциями по batch_size: каждая порция - один DELETE
+    по id. Вне транзакции блокировки держатся только на время порции.
+    """
+    manager = queryset.model._base_manager
+    deleted = 0
+    while True:
+        pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        batch = manager.filter(pk__in=pks)
+        if Collector(using=queryset.db).can_fast_delete(batch):
+            deleted += batch.delete()[0]
+        else:
+            # У рецептов, их ингредиентов и подписок есть получатели
+            # сигналов удаления, а QuerySet.delete() загрузил бы каждый
+            # объект ради них. Их действия (изображения, кэш, индекс
+            # подбора, ленты) для всей порции выполняют delete_recipes
+            # и delete_user, а связанные строки к этому моменту уже
+            # удалены, поэтому порция удаляется без сигналов.
+            deleted += batch._raw_delete(queryset.db)
+
+
+def hide_recipes(recipe_ids):
+    """
+    Рецепты сразу пропадают из списков, страниц и подбора,
+    а их строки удаляет delete_recipes.
+    """
+    Recipe.all_objects.filter(pk__in=recipe_ids).update(is_hidden=True)
+    recipes_deleted.send(sender=Recipe, recipe_ids=recipe_ids)
+
+
+def delete_relations(recipe_ids, batch_size):
+    for model, field in RECIPE_RELATIONS:
+        delete_batches(
+            model.objects.filter(**{f'{field}__in': recipe_ids}),
+            batch_size)
+
+
+def delete_recipes(recipe_ids, batch_size=BATCH_SIZE):
+    """
+    Удаление рецептов вместе со связанными строками. Рецепты сначала
+    скрываются, затем связанные строки удаляются порциями, каждая
+    в своей транзакции, поэтому блокировки держатся недолго, а прерванное
+    удаление продолжает повторный запуск. Сами рецепты удаляются в одной
+    транзакции вместе со строками, добавленными до скрытия; после ее
+    фиксации обновляются индекс подбора и изображения, отправляется
+    сигнал recipes_deleted.
+    """
+    hide_recipes(recipe_ids)
+    delete_relations(recipe_ids, batch_size)
+    with transaction.atomic():
+        delete_relations(recipe_ids, batch_size)
+        recipes = Recipe.all_objects.filter(pk__in=recipe_ids)
+        images = set(recipes.values_list('image', flat=True))
+        delete_batches(recipes, batch_size)
+        for name in images:
+            transaction.on_commit(partial(delete_unreferenced, name))
+        for recipe_id in recipe_ids:
+            transaction.on_commit(partial(publish_change, recipe_id))
+        recipes_deleted.send(sender=Recipe, recipe_ids=recipe_ids)
+
+
+def deactivate_user(user_id):
+    """
+    Отключение учетной записи перед удалением: вход, токены
+    и обновление JWT перестают работать сразу.
+    """
+    User.objects.filter(pk=user_id).update(is_active=False)
+    Token.objects.filter(user=user_id).delete()
+    outstanding = OutstandingToken.objects.filter(
+        user=user_id, blacklistedtoken__isnull=True).values_list(
+            'pk', flat=True)
+    BlacklistedToken.objects.bulk_create(
+        (BlacklistedToken(token_id=pk) for pk in outstanding),
+        ignore_conflicts=True)
+
+
+def delete_user(user_id, batch_size=BATCH_SIZE,
+                recipe_batch_size=RECIPE_BATCH_SIZE):
+    """
+    Фоновое удаление отключенного пользователя: рецепты порциями
+    по recipe_batch_size (каждая порция - отдельная транзакция), затем
+    в одной транзакции избранное, списки покупок, подписки, токены
+    и сама учетная запись. Повторный запуск продолжает удаление.
+    """
+    if User.objects.filter(pk=user_id, is_active=True).exists():
+        logger.warning('Пользователь %s снова активен, удаление отменено',
+                       user_id)
+        return
+    recipes = Recipe.all_objects.filter(author=user_id).order_by(
+        'pk').values_list('pk', flat=True)
+    total = recipes.count()
+    deleted = 0
+    while True:
+        recipe_ids = list(recipes[:recipe_batch_size])
+        if not recipe_ids:
+            break
+        delete_recipes(recipe_ids, batch_size)
+        deleted += len(recipe_ids)
+        logger.info('Пользователь %s: удалено рецептов %s из %s',
+                    user_id, deleted, total)
+    with transaction.atomic():
+        for model, field in USER_RELATIONS:
+            count = delete_batches(
+                model.objects.filter(**{field: user_id}), batch_size)
+            logger.info('Пользователь %s: удалено строк %s: %s',
+                        user_id, model._meta.label, count)
+        User.objects.filter(pk=user_id).delete()
+    logger.info('Пользователь %s удален', user_id)
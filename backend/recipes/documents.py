@@ -0,0 +1,97 @@
+from users.models import User
+from .models import Recipe, RecipeIngredient
+
+BATCH_SIZE = 500
+TAG_FIELDS = ('id', 'name', 'color', 'slug')
+AUTHOR_FIELDS = ('email', 'id', 'username', 'first_name', 'last_name')
+INGREDIENT_FIELDS = ('id', 'name', 'measurement_unit')
+
+
+def build_documents(recipe_ids):
+    """
+    Документы для чтения по данным нормализованных таблиц:
+    теги, ингредиенты с названием и единицами измерения, автор.
+    """
+    recipes = Recipe.objects.filter(pk__in=recipe_ids).values(
+        'pk', *(f'author__{name}' for name in AUTHOR_FIELDS))
+    documents = {
+        recipe['pk']: {
+            'tags': [],
+            'ingredients': [],
+            'author': {
+                name: recipe[f'author__{name}'] for name in AUTHOR_FIELDS},
+        }
+        for recipe in recipes
+    }
+    tags = Recipe.tags.through.objects.filter(
+        recipe__in=documents).order_by('tag_id').values(
+            'recipe_id', *(f'tag__{name}' for name in TAG_FIELDS))
+    for tag in tags:
+        documents[tag['recipe_id']]['tags'].append(
+            {name: tag[f'tag__{name}'] for name in TAG_FIELDS})
+    ingredients = RecipeIngredient.objects.filter(
+        recipe__in=documents).order_by('pk').values(
+            'recipe_id', 'amount',
+            *(f'ingredient__{name}' for name in INGREDIENT_FIELDS))
+    for ingredient in ingredients:
+        item = {
+            name: ingredient[f'ingredient__{name}']
+            for name in INGREDIENT_FIELDS
+        }
+        item['amount'] = ingredient['amount']
+        documents[ingredient['recipe_id']]['ingredients'].append(item)
+    return documents
+
+
+def author_changed(user, update_fields=None):
+    """Изменились ли данные пользователя, входящие в документы рецептов."""
+    fields = [name for name in AUTHOR_FIELDS if name != 'id']
+    if user.pk is None or (update_fields is not None
+                           and not set(update_fields) & set(fields)):
+        return False
+    stored = User.objects.filter(pk=user.pk).values(*fields).first()
+    return stored is not None and any(
+        stored[name] != getattr(user, name) for name in fields)
+
+
+def build_document(recipe):
+    return build_documents([recipe.pk])[recipe.pk]
+
+
+def rebuild_documents(recipe_ids, batch_size=BATCH_SIZE):
+    """Пересборка документов указанных рецептов порциями."""
+    recipe_ids = list(recipe_ids)
+    for start in range(0, len(recipe_ids), batch_size):
+        documents = build_documents(recipe_ids[start:start + batch_size])
+        Recipe.objects.bulk_update(
+            [Recipe(pk=pk, document=document)
+             for pk, document in documents.items()],
+            ('document',))
+
+
+def rebuild_tag_documents(tag_id):
+    """Фоновая пересборка документов рецептов с тегом tag_id."""
+    rebuild_documents(Recipe.tags.through.objects.filter(
+        tag_id=tag_id).values_list('recipe_id', flat=True))
+
+
+def rebuild_ingredient_documents(ingredient_id):
+    """Фоновая пересборка документов рецептов с ингредиентом."""
+    rebuild_documents(RecipeIngredient.objects.filter(
+        ingredient_id=ingredient_id).values_list('recipe_id', flat=True))
+
+
+def rebuild_author_documents(author_id):
+    """Фоновая пересборка документов рецептов автора."""
+    rebuild_documents(Recipe.objects.filter(
+        author=author_id).values_list('pk', flat=True))
+
+
+def diff_documents(recipe_ids):
+    """Id рецептов, документы которых не совпадают с данными таблиц."""
+    stored = dict(Recipe.objects.filter(pk__in=recipe_ids).values_list(
+        'pk', 'document'))
+    return [
+        pk for pk, document in build_documents(recipe_ids).items()
+        if stored.get(pk) != document
+    ]
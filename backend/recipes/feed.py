@@ -0,0 +1,131 @@
+import heapq
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+from users.models import Subscription, User
+from .models import FeedEntry, Recipe
+
+POPULAR_AUTHORS_KEY = 'feed_popular_authors'
+POPULAR_AUTHORS_TIMEOUT = 10 * 60
+BATCH_SIZE = 1000
+
+
+def popular_author_ids():
+    """
+    Авторы с большим числом подписчиков: их рецепты не раскладываются
+    по лентам, а добавляются к ленте при чтении.
+    """
+    authors = cache.get(POPULAR_AUTHORS_KEY)
+    if authors is None:
+        authors = set(Subscription.objects.values('author').annotate(
+            followers=Count('user')).filter(
+                followers__gte=settings.FEED_POPULAR_AUTHOR_FOLLOWERS
+        ).values_list('author', flat=True))
+        cache.set(POPULAR_AUTHORS_KEY, authors, POPULAR_AUTHORS_TIMEOUT)
+    return authors
+
+
+def beyond(queryset, id_field, position, lookup):
+    """Записи с ключом (pub_date, id_field) меньше (lt) или больше (gt)."""
+    pub_date, recipe_id = position
+    return queryset.filter(
+        Q(**{f'pub_date__{lookup}': pub_date})
+        | Q(pub_date=pub_date, **{f'{id_field}__{lookup}': recipe_id}))
+
+
+def after(queryset, id_field, position, reverse, limit):
+    """
+    Пары (дата публикации, id рецепта) после позиции курсора
+    в направлении чтения: от новых к старым или, при reverse, обратно.
+    """
+    if position is not None:
+        queryset = beyond(
+            queryset, id_field, position, 'gt' if reverse else 'lt')
+    order = (
+        ('pub_date', id_field) if reverse else ('-pub_date', f'-{id_field}'))
+    return list(queryset.order_by(*order).values_list(
+        'pub_date', id_field)[:limit])
+
+
+def feed_page(user_id, position, reverse, limit):
+    """
+    Не более limit записей ленты после позиции курсора. Записи читаются
+    из таблицы лент по индексу (user, pub_date), у каждого популярного
+    автора берется не более limit рецептов, источники сливаются
+    по дате публикации.
+    """
+    sources = [after(FeedEntry.objects.filter(user=user_id), 'recipe_id',
+                     position, reverse, limit)]
+    popular_authors = Subscription.objects.filter(
+        user=user_id, author__in=popular_author_ids()).values_list(
+            'author', flat=True)
+    for author_id in popular_authors:
+        sources.append(after(Recipe.objects.filter(author=author_id), 'id',
+                             position, reverse, limit))
+    page = []
+    seen = set()
+    for pub_date, recipe_id in heapq.merge(*sources, reverse=not reverse):
+        if recipe_id in seen:
+            continue
+        seen.add(recipe_id)
+        page.append((pub_date, recipe_id))
+        if len(page) == limit:
+            break
+    return page
+
+
+def trim(user_ids):
+    """
+    Обрезка лент до FEED_SIZE записей. Ленты обрезаются, когда
+    превышают размер на десятую часть, чтобы не удалять по одной
+    записи после каждого нового рецепта.
+    """
+    # order_by() убирает сортировку модели из GROUP BY.
+    counts = FeedEntry.objects.filter(user__in=user_ids).order_by().values(
+        'user').annotate(count=Count('pk'))
+    overflowing = counts.filter(
+        count__gt=settings.FEED_SIZE * 1.1).values_list('user', flat=True)
+    for user_id in overflowing:
+        entries = FeedEntry.objects.filter(user=user_id)
+        oldest_kept = entries.order_by('-pub_date', '-recipe_id').values_list(
+            'pub_date', 'recipe_id')[settings.FEED_SIZE - 1]
+        beyond(entries, 'recipe_id', oldest_kept, 'lt').delete()
+
+
+def fan_out(recipe_id):
+    """Добавление нового рецепта в ленты подписчиков автора."""
+    recipe = Recipe.objects.filter(pk=recipe_id).values(
+        'author_id', 'pub_date').first()
+    if recipe is None or recipe['author_id'] in popular_author_ids():
+        return
+    followers = list(Subscription.objects.filter(
+        author=recipe['author_id']).values_list('user_id', flat=True))
+    for start in range(0, len(followers), BATCH_SIZE):
+        batch = followers[start:start + BATCH_SIZE]
+        FeedEntry.objects.bulk_create(
+            (FeedEntry(user_id=user_id, recipe_id=recipe_id,
+                       pub_date=recipe['pub_date']) for user_id in batch),
+            ignore_conflicts=True)
+        trim(batch)
+
+
+@transaction.atomic
+def rebuild_timeline(user_id):
+    """
+    Пересборка ленты пользователя из последних рецептов авторов,
+    на которых он подписан. Лента ограничена FEED_SIZE записями.
+    """
+    FeedEntry.objects.filter(user=user_id).delete()
+    if not User.objects.filter(pk=user_id).exists():
+        return
+    recipes = Recipe.objects.filter(
+        author__subscription__user=user_id).exclude(
+            author__in=popular_author_ids()).order_by(
+                '-pub_date').values_list('id', 'pub_date')
+    FeedEntry.objects.bulk_create(
+        FeedEntry(user_id=user_id, recipe_id=recipe_id, pub_date=pub_date)
+        for recipe_id, pub_date in recipes[:settings.FEED_SIZE]
+    )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from recipes.similarity import SIMILAR_LIMIT, build_similar
+
+
+class Command(BaseCommand):
+    help = 'Пересчет похожих рецептов для всего каталога'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=SIMILAR_LIMIT,
+            help='Количество похожих рецептов для каждого рецепта')
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Количество рецептов, сохраняемых за одну транзакцию')
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Количество рецептов-кандидатов, читаемых за один запрос')
+
+    def handle(self, *args, **options):
+        for done, total in build_similar(
+                options['limit'], options['chunk_size'],
+                options['batch_size']):
+            self.stdout.write(f'Обработано рецептов: {done} из {total}')
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from recipes.media import collect_garbage
+
+
+class Command(BaseCommand):
+    help = 'Удаление изображений рецептов, на которые нет ссылок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только вывести найденные файлы, ничего не удалять')
+        parser.add_argument(
+            '--older-than', type=float, default=24,
+            help='Пропускать файлы моложе указанного числа часов')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество файлов, проверяемых одним запросом')
+
+    def handle(self, *args, **options):
+        count = size = 0
+        for entries in collect_garbage(
+                options['older_than'] * 60 * 60,
+                options['batch_size'], options['dry_run']):
+            for entry in entries:
+                if options['dry_run']:
+                    self.stdout.write(entry.path)
+                count += 1
+                # Результат stat кэшируется в DirEntry при обходе каталога.
+                size += entry.stat().st_size
+        action = 'Найдено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(
+            f'{action} файлов: {count} ({size / 2 ** 20:.1f} МБ)')
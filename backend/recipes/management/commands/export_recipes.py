@@ -0,0 +1,37 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.transfer import (BATCH_SIZE, RECORDS_FILE, copy_image,
+                              recipe_records, write_record)
+
+
+class Command(BaseCommand):
+    help = 'Выгрузка рецептов в NDJSON с изображениями'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Каталог для выгрузки')
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Количество рецептов, читаемых из базы за один запрос')
+
+    def handle(self, *args, **options):
+        directory = options['directory']
+        os.makedirs(directory, exist_ok=True)
+        started = time.monotonic()
+        count = 0
+        path = os.path.join(directory, RECORDS_FILE)
+        with open(path, 'w', encoding='utf-8') as file:
+            for record in recipe_records(options['batch_size']):
+                write_record(file, record)
+                copy_image(record['image'], directory)
+                count += 1
+                if count % options['batch_size'] == 0:
+                    self.report(count, started)
+        self.report(count, started)
+
+    def report(self, count, started):
+        rate = count / max(time.monotonic() - started, 1e-6)
+        self.stdout.write(
+            f'Выгружено рецептов: {count} ({rate:.0f} в секунду)')
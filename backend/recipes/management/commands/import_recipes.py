@@ -0,0 +1,46 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.transfer import BATCH_SIZE, RECORDS_FILE, RecipeImporter
+
+
+class Command(BaseCommand):
+    help = 'Загрузка рецептов из NDJSON, выгруженного export_recipes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Каталог с выгрузкой')
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Количество рецептов, сохраняемых за одну транзакцию')
+
+    def handle(self, *args, **options):
+        directory = options['directory']
+        importer = RecipeImporter(directory, options['batch_size'])
+        started = time.monotonic()
+        count = 0
+        path = os.path.join(directory, RECORDS_FILE)
+        with open(path, encoding='utf-8') as file:
+            for number, line in enumerate(file, 1):
+                if not line.strip():
+                    continue
+                try:
+                    saved = importer.add(json.loads(line))
+                except (ValueError, KeyError, OSError) as error:
+                    raise CommandError(
+                        f'Ошибка в строке {number}: {error!r}') from error
+                if saved:
+                    count += saved
+                    self.report(count, started)
+        count += importer.flush()
+        self.report(count, started)
+        if importer.skipped:
+            self.stderr.write(
+                f'Пропущено рецептов без автора в базе: {importer.skipped}')
+
+    def report(self, count, started):
+        rate = count / max(time.monotonic() - started, 1e-6)
+        self.stdout.write(
+            f'Загружено рецептов: {count} ({rate:.0f} в секунду)')
@@ -4,6 +4,7 @@ import json
 from django.conf import settings
 from django.core.management.base import BaseCommand
 
+from recipes.catalog import build_catalog
 from recipes.models import Ingredient
 
 
@@ -14,8 +15,11 @@ class Command(BaseCommand):
 
         with open(file_path, 'r', encoding='utf-8', ) as file:
             data = json.load(file)
-            for element in data:
-                Ingredient.objects.create(
+            Ingredient.objects.bulk_create(
+                Ingredient(
                     name=element.get('name'),
                     measurement_unit=element.get('measurement_unit')
                 )
+                for element in data
+            )
+        build_catalog()
@@ -0,0 +1,21 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from recipes.feed import POPULAR_AUTHORS_KEY, rebuild_timeline
+from users.models import Subscription
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересборка лент подписок: лишние записи удаляются, '
+        'рецепты популярных авторов убираются из лент'
+    )
+
+    def handle(self, *args, **options):
+        cache.delete(POPULAR_AUTHORS_KEY)
+        users = Subscription.objects.order_by('user').values_list(
+            'user', flat=True).distinct()
+        for count, user_id in enumerate(users.iterator(), 1):
+            rebuild_timeline(user_id)
+            if count % 1000 == 0:
+                self.stdout.write(f'Обработано лент: {count}')
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.documents import BATCH_SIZE, diff_documents, rebuild_documents
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Пересборка документов рецептов для чтения'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Только сравнить документы с данными таблиц')
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Количество рецептов, обрабатываемых за один раз')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        recipe_ids = list(
+            Recipe.objects.order_by('pk').values_list('pk', flat=True))
+        if not options['verify']:
+            rebuild_documents(recipe_ids, batch_size)
+            self.stdout.write(f'Обновлено рецептов: {len(recipe_ids)}')
+            return
+        mismatched = []
+        for start in range(0, len(recipe_ids), batch_size):
+            mismatched += diff_documents(
+                recipe_ids[start:start + batch_size])
+        if mismatched:
+            raise CommandError(
+                'Документы не совпадают с данными таблиц, id рецептов: '
+                + ', '.join(map(str, mismatched)))
+        self.stdout.write(f'Проверено рецептов: {len(recipe_ids)}')
@@ -0,0 +1,150 @@
+import io
+import os
+import random
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from PIL import Image
+
+from recipes.feed import rebuild_timeline
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from recipes.popularity import recompute
+from recipes.transfer import BATCH_SIZE, MEDIA_DIR, RecipeImporter
+from users.models import Subscription, User
+
+EMAIL = 'loadtest{}@example.com'
+IMAGE_NAME = 'loadtest.png'
+TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+)
+
+
+def write_image(directory):
+    """Изображение рецептов: одинаковое содержимое хранится один раз."""
+    path = os.path.join(directory, MEDIA_DIR, IMAGE_NAME)
+    os.makedirs(os.path.dirname(path))
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), (226, 108, 45)).save(buffer, 'PNG')
+    with open(path, 'wb') as file:
+        file.write(buffer.getvalue())
+
+
+class Command(BaseCommand):
+    help = (
+        'Тестовые данные для нагрузочного тестирования (loadtest): '
+        'пользователи loadtestN@example.com, их рецепты, подписки, '
+        'избранное и списки покупок'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=100,
+            help='Количество пользователей')
+        parser.add_argument(
+            '--recipes', type=int, default=1000,
+            help='Количество рецептов')
+        parser.add_argument(
+            '--password', default='loadtest-password',
+            help='Пароль пользователей')
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Количество рецептов, сохраняемых за одну транзакцию')
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Начальное значение генератора случайных чисел')
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        ingredients = list(Ingredient.objects.values_list(
+            'name', 'measurement_unit'))
+        if not ingredients:
+            raise CommandError(
+                'Справочник ингредиентов пуст, выполните load_ingredients')
+        if not Tag.objects.exists():
+            Tag.objects.bulk_create(
+                Tag(name=name, color=color, slug=slug)
+                for name, color, slug in TAGS)
+        emails = self.create_users(options['users'], options['password'])
+        self.create_recipes(
+            options['recipes'], emails, ingredients, options['batch_size'])
+        user_ids = list(User.objects.filter(
+            email__in=emails).values_list('pk', flat=True))
+        self.create_relations(user_ids)
+        for _ in recompute():
+            pass
+        for user_id in user_ids:
+            rebuild_timeline(user_id)
+        self.stdout.write(
+            f'Пароль пользователей {EMAIL.format("N")}: '
+            f'{options["password"]}')
+
+    def create_users(self, count, password):
+        password = make_password(password)
+        emails = [EMAIL.format(number) for number in range(count)]
+        User.objects.bulk_create(
+            (User(
+                email=email, username=email.split('@')[0], password=password,
+                first_name='Нагрузка', last_name=str(number))
+             for number, email in enumerate(emails)),
+            ignore_conflicts=True)
+        self.stdout.write(f'Пользователей: {count}')
+        return emails
+
+    def create_recipes(self, count, emails, ingredients, batch_size):
+        tags = list(Tag.objects.values_list('slug', flat=True))
+        now = timezone.now()
+        with tempfile.TemporaryDirectory() as directory:
+            write_image(directory)
+            importer = RecipeImporter(directory, batch_size)
+            for number in range(count):
+                importer.add({
+                    'name': f'Рецепт нагрузочного теста {number}',
+                    'text': 'Описание рецепта. ' * self.random.randint(5, 50),
+                    'cooking_time': self.random.randint(5, 180),
+                    'pub_date': (now - timedelta(
+                        minutes=self.random.randint(0, 60 * 24 * 90))
+                    ).isoformat(),
+                    'image': IMAGE_NAME,
+                    'author': self.random.choice(emails),
+                    'tags': self.random.sample(
+                        tags, self.random.randint(1, len(tags))),
+                    'ingredients': [
+                        {'name': name, 'measurement_unit': unit,
+                         'amount': self.random.randint(1, 500)}
+                        for name, unit in self.random.sample(
+                            ingredients,
+                            min(len(ingredients), self.random.randint(3, 12)))
+                    ],
+                })
+            importer.flush()
+        self.stdout.write(f'Рецептов: {count}')
+
+    def create_relations(self, user_ids):
+        """Подписки, избранное и списки покупок пользователей."""
+        recipe_ids = list(Recipe.objects.filter(
+            author__in=user_ids).values_list('pk', flat=True))
+        subscriptions, favorites, carts = [], [], []
+        for user_id in user_ids:
+            for author_id in self.random.sample(
+                    user_ids, min(len(user_ids), 10)):
+                if author_id != user_id:
+                    subscriptions.append(
+                        Subscription(user_id=user_id, author_id=author_id))
+            for recipe_id in self.random.sample(
+                    recipe_ids, min(len(recipe_ids), 20)):
+                favorites.append(
+                    Favorite(user_id=user_id, recipe_id=recipe_id))
+            for recipe_id in self.random.sample(
+                    recipe_ids, min(len(recipe_ids), 5)):
+                carts.append(
+                    ShoppingCart(user_id=user_id, recipe_id=recipe_id))
+        for model, objects in ((Subscription, subscriptions),
+                               (Favorite, favorites),
+                               (ShoppingCart, carts)):
+            model.objects.bulk_create(
+                objects, batch_size=BATCH_SIZE, ignore_conflicts=True)
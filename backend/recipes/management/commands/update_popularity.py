@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from recipes.popularity import recompute
+
+
+class Command(BaseCommand):
+    help = 'Пересчет популярности рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество рецептов, обновляемых одним запросом')
+
+    def handle(self, *args, **options):
+        total = 0
+        for count in recompute(options['batch_size']):
+            total += count
+        self.stdout.write(f'Обновлено рецептов: {total}')
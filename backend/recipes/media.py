@@ -0,0 +1,67 @@
+import os
+import time
+
+from django.conf import settings
+
+from .models import Recipe
+
+IMAGE_DIR = Recipe._meta.get_field('image').upload_to.rstrip('/')
+image_storage = Recipe._meta.get_field('image').storage
+
+
+def delete_unreferenced(name):
+    """Удаление изображения, если на него не ссылается ни один рецепт."""
+    if name and not Recipe.all_objects.filter(image=name).exists():
+        image_storage.delete(name)
+
+
+def scan_files(path):
+    """Обход дерева каталогов без построения полного списка файлов."""
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from scan_files(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+def unreferenced_files(entries):
+    """Файлы порции, на которые не ссылается ни один рецепт."""
+    names = {
+        os.path.relpath(entry.path, settings.MEDIA_ROOT).replace(
+            os.sep, '/'): entry
+        for entry in entries
+    }
+    referenced = set(Recipe.all_objects.filter(image__in=names).values_list(
+        'image', flat=True))
+    return [entry for name, entry in names.items() if name not in referenced]
+
+
+def collect_garbage(older_than, batch_size=1000, dry_run=False):
+    """
+    Поиск и удаление изображений рецептов, на которые нет ссылок.
+    Файлы моложе older_than секунд пропускаются: они могут относиться
+    к еще не сохраненным рецептам. Порциями выдаются списки
+    найденных файлов.
+    """
+    root = os.path.join(settings.MEDIA_ROOT, IMAGE_DIR)
+    if not os.path.isdir(root):
+        return
+    deadline = time.time() - older_than
+    batch = []
+    for entry in scan_files(root):
+        if entry.stat().st_mtime > deadline:
+            continue
+        batch.append(entry)
+        if len(batch) == batch_size:
+            yield remove(unreferenced_files(batch), dry_run)
+            batch = []
+    if batch:
+        yield remove(unreferenced_files(batch), dry_run)
+
+
+def remove(entries, dry_run):
+    if not dry_run:
+        for entry in entries:
+            os.remove(entry.path)
+    return entries
@@ -0,0 +1,37 @@
+# Generated by Django 3.2.18 on 2026-10-19 07:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_alter_recipe_image'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipeingredient',
+            name='amount',
+            field=models.PositiveSmallIntegerField(verbose_name='Количество'),
+        ),
+        migrations.CreateModel(
+            name='SimilarRecipe',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Сходство')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_recipes', to='recipes.recipe', verbose_name='Рецепт')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_to', to='recipes.recipe', verbose_name='Похожий рецепт')),
+            ],
+            options={
+                'verbose_name': 'Похожий рецепт',
+                'verbose_name_plural': 'Похожие рецепты',
+                'ordering': ('-score',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='similarrecipe',
+            constraint=models.UniqueConstraint(fields=('recipe', 'similar'), name='unique_similar_recipe'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2.18 on 2026-10-19 07:57
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0004_similarrecipe'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='recipes.recipe', verbose_name='Рецепт')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL, verbose_name='Подписчик')),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Записи лент',
+                'ordering': ('-pub_date',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['user', '-pub_date'], name='feed_entry_user_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_feed_entry'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.18 on 2026-10-19 07:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_feedentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='popularity',
+            field=models.FloatField(db_index=True, default=0, verbose_name='Популярность'),
+        ),
+    ]
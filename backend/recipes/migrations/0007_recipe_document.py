@@ -0,0 +1,18 @@
+# Generated by Django 3.2.18 on 2026-10-19 08:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_popularity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='document',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Документ для чтения'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.18 on 2026-10-19 08:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_recipe_image_storage'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='feedentry',
+            name='feed_entry_user_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['user', '-pub_date', '-recipe'], name='feed_entry_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-pub_date', '-id'], name='recipe_author_date_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.18 on 2026-10-19 09:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_feed_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='is_hidden',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Скрыт до удаления'),
+        ),
+    ]
@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, RegexValidator
 
+from .storage import ContentAddressedStorage
+
 
 User = get_user_model()
 
@@ -62,6 +64,13 @@ class Ingredient(models.Model):
         return self.name
 
 
+class VisibleRecipeManager(models.Manager):
+    """Рецепты без скрытых перед удалением."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_hidden=False)
+
+
 class Recipe(models.Model):
     """Содержит данные о рецептах."""
     name = models.CharField(
@@ -73,6 +82,7 @@ class Recipe(models.Model):
     )
     image = models.ImageField(
         upload_to='recipes/',
+        storage=ContentAddressedStorage(),
         verbose_name='Фотография',
     )
     cooking_time = models.PositiveSmallIntegerField(
@@ -103,11 +113,36 @@ class Recipe(models.Model):
         db_index=True,
         verbose_name='Дата публикации',
     )
+    popularity = models.FloatField(
+        default=0,
+        db_index=True,
+        verbose_name='Популярность',
+    )
+    document = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Документ для чтения',
+    )
+    is_hidden = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Скрыт до удаления',
+    )
+
+    objects = VisibleRecipeManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = (
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='recipe_author_date_idx',
+            ),
+        )
 
     def __str__(self):
         return self.name
@@ -201,3 +236,75 @@ class Favorite(models.Model):
 
     def __str__(self):
         return f'{self.user} - {self.recipe}'
+
+
+class SimilarRecipe(models.Model):
+    """Похожие рецепты, рассчитанные заранее по ингредиентам и тегам."""
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_recipes',
+        verbose_name='Рецепт',
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_to',
+        verbose_name='Похожий рецепт',
+    )
+    score = models.FloatField(
+        verbose_name='Сходство',
+    )
+
+    class Meta:
+        ordering = ('-score',)
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('recipe', 'similar'),
+                name='unique_similar_recipe',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.recipe_id} ~ {self.similar_id}'
+
+
+class FeedEntry(models.Model):
+    """Лента пользователя: новые рецепты авторов, на которых он подписан."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Подписчик',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Рецепт',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+    )
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи лент'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_feed_entry',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-recipe'),
+                name='feed_entry_user_date_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user_id}: {self.recipe_id}'
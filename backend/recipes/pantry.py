@@ -0,0 +1,117 @@
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter, namedtuple
+
+from django.core.cache import cache
+
+from .models import RecipeIngredient
+
+GENERATION_KEY = 'pantry_index_generation'
+CHANGE_KEY = 'pantry_index_change_%s'
+CHANGE_TIMEOUT = 60 * 60
+MAX_REPLAY = 1000
+
+Match = namedtuple('Match', ('recipe_id', 'matched', 'total'))
+
+
+def publish_change(recipe_id):
+    """Запись об измененном рецепте в журнал изменений индекса."""
+    cache.add(GENERATION_KEY, 0, None)
+    generation = cache.incr(GENERATION_KEY)
+    cache.set(CHANGE_KEY % generation, recipe_id, CHANGE_TIMEOUT)
+
+
+class IngredientIndex:
+    """
+    Инвертированный индекс: id ингредиента -> отсортированный массив
+    id рецептов, в которые он входит.
+    Индекс хранится в памяти процесса. Изменения рецептов публикуются
+    в кэше как журнал с номером поколения; отставший процесс перечитывает
+    из базы только изменившиеся рецепты, а если журнал утерян -
+    строит индекс заново.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.generation = None
+        self.postings = {}
+        self.recipes = {}
+
+    def build(self):
+        generation = cache.get(GENERATION_KEY, 0)
+        postings = {}
+        recipes = {}
+        rows = RecipeIngredient.objects.order_by(
+            'ingredient_id', 'recipe_id').values_list(
+                'ingredient_id', 'recipe_id')
+        for ingredient_id, recipe_id in rows.iterator():
+            postings.setdefault(ingredient_id, array('q')).append(recipe_id)
+            recipes.setdefault(recipe_id, array('q')).append(ingredient_id)
+        self.postings, self.recipes = postings, recipes
+        self.generation = generation
+
+    def update(self, recipe_ids):
+        """Перечитывание ингредиентов указанных рецептов из базы."""
+        for recipe_id in recipe_ids:
+            for ingredient_id in self.recipes.pop(recipe_id, ()):
+                recipes = self.postings[ingredient_id]
+                position = bisect_left(recipes, recipe_id)
+                if (position < len(recipes)
+                        and recipes[position] == recipe_id):
+                    del recipes[position]
+        rows = RecipeIngredient.objects.filter(
+            recipe_id__in=recipe_ids).values_list('ingredient_id', 'recipe_id')
+        for ingredient_id, recipe_id in rows:
+            recipes = self.postings.setdefault(ingredient_id, array('q'))
+            recipes.insert(bisect_left(recipes, recipe_id), recipe_id)
+            self.recipes.setdefault(recipe_id, array('q')).append(
+                ingredient_id)
+
+    def refresh(self):
+        """Синхронизация индекса с журналом изменений."""
+        generation = cache.get(GENERATION_KEY, 0)
+        if generation == self.generation:
+            return
+        with self.lock:
+            if (self.generation is None or generation < self.generation
+                    or generation - self.generation > MAX_REPLAY):
+                self.build()
+                return
+            keys = [CHANGE_KEY % number
+                    for number in range(self.generation + 1, generation + 1)]
+            changes = cache.get_many(keys)
+            if len(changes) < len(keys):
+                self.build()
+                return
+            self.update(set(changes.values()))
+            self.generation = generation
+
+    def match(self, ingredients, missing=None):
+        """
+        Рецепты, в которых есть хотя бы один из ингредиентов, в порядке
+        убывания доли имеющихся ингредиентов.
+        Если задан missing, остаются только рецепты, для которых
+        не хватает не более missing ингредиентов.
+        """
+        self.refresh()
+        counter = Counter()
+        with self.lock:
+            for ingredient_id in set(ingredients):
+                counter.update(self.postings.get(ingredient_id, ()))
+            matches = [
+                Match(recipe_id, matched, len(self.recipes[recipe_id]))
+                for recipe_id, matched in counter.items()
+            ]
+        if missing is not None:
+            matches = [match for match in matches
+                       if match.total - match.matched <= missing]
+        matches.sort(key=lambda match: (
+            -match.matched / match.total,
+            match.total - match.matched,
+            -match.recipe_id,
+        ))
+        return matches
+
+
+ingredient_index = IngredientIndex()
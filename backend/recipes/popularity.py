@@ -0,0 +1,52 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Favorite, Recipe, ShoppingCart
+
+BASE_POINTS = 1
+POINTS = {
+    Favorite: 2,
+    ShoppingCart: 1,
+}
+# Чем больше значение, тем быстрее старые рецепты теряют популярность.
+GRAVITY = 1.5
+
+
+def score(points, pub_date, now=None):
+    """Очки рецепта, затухающие со временем после публикации."""
+    hours = ((now or timezone.now()) - pub_date).total_seconds() / 3600
+    return points / (max(hours, 0) + 2) ** GRAVITY
+
+
+def nudge(recipe, points):
+    """Изменение популярности рецепта без полного пересчета."""
+    Recipe.objects.filter(pk=recipe.pk).update(
+        popularity=F('popularity') + score(points, recipe.pub_date))
+
+
+def count_subquery(model):
+    return Coalesce(Subquery(
+        model.objects.filter(recipe=OuterRef('pk')).order_by().values(
+            'recipe').annotate(count=Count('pk')).values('count')), 0)
+
+
+def recompute(batch_size=1000):
+    """Пересчет популярности всех рецептов порциями."""
+    now = timezone.now()
+    recipes = Recipe.objects.annotate(
+        favorites=count_subquery(Favorite),
+        carts=count_subquery(ShoppingCart),
+    ).only('pk', 'pub_date').order_by('pk')
+    batch = []
+    for recipe in recipes.iterator(chunk_size=batch_size):
+        points = (BASE_POINTS + POINTS[Favorite] * recipe.favorites
+                  + POINTS[ShoppingCart] * recipe.carts)
+        recipe.popularity = score(points, recipe.pub_date, now)
+        batch.append(recipe)
+        if len(batch) == batch_size:
+            Recipe.objects.bulk_update(batch, ('popularity',))
+            yield len(batch)
+            batch = []
+    Recipe.objects.bulk_update(batch, ('popularity',))
+    yield len(batch)
@@ -0,0 +1,142 @@
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+
+from jobs.queue import enqueue, enqueue_on_commit
+from users.models import Subscription, User
+from .catalog import build_catalog
+from .documents import (author_changed, rebuild_author_documents,
+                        rebuild_documents, rebuild_ingredient_documents,
+                        rebuild_tag_documents)
+from .feed import fan_out, rebuild_timeline
+from .media import delete_unreferenced
+from .models import Ingredient, Recipe, RecipeIngredient, Tag
+from .pantry import publish_change
+from .popularity import BASE_POINTS, nudge
+from .similarity import refresh_similar
+
+
+class Callback(namedtuple('Callback', ('func', 'args'))):
+    def __call__(self):
+        self.func(*self.args)
+
+
+def on_commit_once(func, *args):
+    """
+    Регистрация обработчика после фиксации транзакции не более одного
+    раза: при сохранении рецепта сигналы приходят на каждый ингредиент.
+    """
+    callback = Callback(func, args)
+    connection = transaction.get_connection()
+    if any(item[1] == callback for item in connection.run_on_commit):
+        return
+    transaction.on_commit(callback)
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def recipe_ingredients_changed(sender, instance, **kwargs):
+    """Обновление документа и индексов после изменения ингредиентов."""
+    on_commit_once(rebuild_documents, (instance.recipe_id,))
+    on_commit_once(publish_change, instance.recipe_id)
+    on_commit_once(enqueue, refresh_similar, instance.recipe_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, reverse, pk_set,
+                        **kwargs):
+    """
+    Обновление документов и похожих рецептов после изменения тегов.
+    Очистку тегов со стороны тега выполняет tag_deleted.
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    recipe_ids = (pk_set or ()) if reverse else (instance.pk,)
+    for recipe_id in recipe_ids:
+        on_commit_once(rebuild_documents, (recipe_id,))
+        on_commit_once(enqueue, refresh_similar, recipe_id)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(sender, instance, created, raw, **kwargs):
+    """
+    Начальная популярность и рассылка нового рецепта по лентам.
+    Загружаемые данные (raw) обрабатываются порцией в transfer.
+    """
+    if created and not raw:
+        nudge(instance, BASE_POINTS)
+        on_commit_once(enqueue, fan_out, instance.pk)
+
+
+@receiver((post_save, post_delete), sender=Subscription)
+def subscription_changed(sender, instance, **kwargs):
+    """Пересборка ленты после подписки или отписки."""
+    on_commit_once(enqueue, rebuild_timeline, instance.user_id)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredients_changed(sender, **kwargs):
+    """Новый снимок справочника после изменения ингредиентов."""
+    on_commit_once(build_catalog)
+
+
+@receiver(post_save, sender=Tag)
+def tag_changed(sender, instance, created, **kwargs):
+    """
+    Обновление документов рецептов с измененным тегом. Рецептов может
+    быть много, поэтому документы пересобираются в фоне, как и после
+    изменения ингредиента или автора.
+    """
+    if not created:
+        enqueue_on_commit(rebuild_tag_documents, instance.pk)
+
+
+@receiver(pre_delete, sender=Tag)
+def tag_deleted(sender, instance, **kwargs):
+    """Удаление тега из документов рецептов."""
+    recipe_ids = list(instance.recipes.values_list('pk', flat=True))
+    instance.recipes.clear()
+    if recipe_ids:
+        enqueue_on_commit(rebuild_documents, recipe_ids)
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_changed(sender, instance, created, **kwargs):
+    """Обновление документов рецептов с измененным ингредиентом."""
+    if not created:
+        enqueue_on_commit(rebuild_ingredient_documents, instance.pk)
+
+
+@receiver(pre_save, sender=User)
+def user_saving(sender, instance, update_fields, **kwargs):
+    """
+    Признак author_changed для обработчиков post_save: изменились
+    имя, логин или почта, которые входят в документы рецептов.
+    """
+    instance.author_changed = author_changed(instance, update_fields)
+
+
+@receiver(post_save, sender=User)
+def author_saved(sender, instance, **kwargs):
+    """Обновление автора в документах его рецептов."""
+    if instance.author_changed:
+        enqueue_on_commit(rebuild_author_documents, instance.pk)
+
+
+@receiver(pre_save, sender=Recipe)
+def recipe_image_replaced(sender, instance, update_fields, **kwargs):
+    """Удаление замененного изображения после фиксации транзакции."""
+    if instance.pk is None or (update_fields and 'image' not in update_fields):
+        return
+    old_image = Recipe.objects.filter(pk=instance.pk).values_list(
+        'image', flat=True).first()
+    if old_image and old_image != instance.image.name:
+        on_commit_once(delete_unreferenced, old_image)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    """Удаление изображения удаленного рецепта."""
+    on_commit_once(delete_unreferenced, instance.image.name)
@@ -0,0 +1,258 @@
+import heapq
+import math
+from collections import defaultdict
+from itertools import islice
+from operator import itemgetter
+
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Recipe, RecipeIngredient, SimilarRecipe
+
+SIMILAR_LIMIT = 10
+TAG_WEIGHT = 0.5
+# Ингредиенты, входящие в большую долю рецептов (соль, вода),
+# не порождают кандидатов, но учитываются при расчете сходства.
+COMMON_RATIO = 0.05
+
+
+class FeatureMatrix:
+    """
+    Разреженные векторы рецептов: ингредиенты и теги с весами IDF.
+    Признак ингредиента кодируется его id, признак тега - минус id тега.
+    Веса и векторы загружаются для всего каталога или только
+    для указанных рецептов; полный пересчет build_similar читает
+    векторы порциями.
+    """
+
+    def __init__(self):
+        self.total = Recipe.objects.count() or 1
+        self.weights = {}
+        self.common = set()
+        self.features = {}
+        self.postings = defaultdict(list)
+        self.norms = {}
+
+    def load_weights(self, recipe_ids=None):
+        """Веса признаков всего каталога или только признаков recipe_ids."""
+        ingredients = RecipeIngredient.objects.all()
+        tags = Recipe.tags.through.objects.all()
+        if recipe_ids is not None:
+            ingredients = ingredients.filter(
+                ingredient__in=RecipeIngredient.objects.filter(
+                    recipe_id__in=recipe_ids).values('ingredient_id'))
+            tags = tags.filter(tag__in=Recipe.tags.through.objects.filter(
+                recipe_id__in=recipe_ids).values('tag_id'))
+        ingredient_counts = ingredients.values('ingredient').annotate(
+            count=Count('recipe')).values_list('ingredient', 'count')
+        for ingredient_id, count in ingredient_counts:
+            self.weights[ingredient_id] = math.log(1 + self.total / count)
+            if count > COMMON_RATIO * self.total and count > SIMILAR_LIMIT:
+                self.common.add(ingredient_id)
+        tag_counts = tags.values('tag').annotate(
+            count=Count('recipe')).values_list('tag', 'count')
+        for tag_id, count in tag_counts:
+            self.weights[-tag_id] = TAG_WEIGHT * math.log(
+                1 + self.total / count)
+        return self
+
+    def vectors(self, recipe_ids=None):
+        """Признаки и нормы векторов всего каталога или recipe_ids."""
+        features = defaultdict(set)
+        ingredients = RecipeIngredient.objects.values_list(
+            'recipe_id', 'ingredient_id')
+        tags = Recipe.tags.through.objects.values_list('recipe_id', 'tag_id')
+        if recipe_ids is not None:
+            ingredients = ingredients.filter(recipe_id__in=recipe_ids)
+            tags = tags.filter(recipe_id__in=recipe_ids)
+        for recipe_id, ingredient_id in ingredients.iterator():
+            features[recipe_id].add(ingredient_id)
+        for recipe_id, tag_id in tags.iterator():
+            features[recipe_id].add(-tag_id)
+        norms = {
+            recipe_id: math.sqrt(sum(
+                self.weights.get(feature, 0) ** 2 for feature in values))
+            for recipe_id, values in features.items()
+        }
+        return features, norms
+
+    def rare(self, features):
+        """Признаки, по которым подбираются кандидаты."""
+        return (feature for feature in features
+                if feature > 0 and feature not in self.common)
+
+    def load(self, recipe_ids=None):
+        self.features, self.norms = self.vectors(recipe_ids)
+        for recipe_id, features in self.features.items():
+            for feature in self.rare(features):
+                self.postings[feature].append(recipe_id)
+        return self
+
+    def similarity(self, features, norm, other, other_norm):
+        """Косинусная мера сходства двух векторов."""
+        product = sum(
+            self.weights.get(feature, 0) ** 2
+            for feature in other if feature in features)
+        return product / (norm * other_norm)
+
+    def scores(self, recipe_id):
+        """Косинусная мера сходства со всеми рецептами-кандидатами."""
+        features = self.features.get(recipe_id, ())
+        norm = self.norms.get(recipe_id)
+        if not norm:
+            return []
+        candidates = set()
+        for feature in features:
+            candidates.update(self.postings.get(feature, ()))
+        candidates.discard(recipe_id)
+        return [
+            (candidate, self.similarity(
+                features, norm, self.features[candidate],
+                self.norms[candidate]))
+            for candidate in candidates
+        ]
+
+    def neighbours(self, recipe_id, limit=SIMILAR_LIMIT):
+        """Ближайшие рецепты по косинусной мере сходства."""
+        return heapq.nlargest(
+            limit, self.scores(recipe_id), key=itemgetter(1))
+
+
+def save_neighbours(neighbours):
+    """Замена списков похожих: neighbours - {id рецепта: [(id, мера)]}."""
+    with transaction.atomic():
+        SimilarRecipe.objects.filter(recipe_id__in=list(neighbours)).delete()
+        SimilarRecipe.objects.bulk_create(
+            SimilarRecipe(recipe_id=recipe_id, similar_id=similar_id,
+                          score=score)
+            for recipe_id, similar in neighbours.items()
+            for similar_id, score in similar
+        )
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def chunk_neighbours(matrix, chunk, limit, batch_size):
+    """
+    Ближайшие рецепты для порции chunk. Кандидаты - рецепты с общими
+    редкими ингредиентами - читаются пачками по batch_size, для каждого
+    рецепта порции хранятся только limit лучших.
+    """
+    features, norms = matrix.vectors(chunk)
+    postings = defaultdict(list)
+    for recipe_id, values in features.items():
+        for feature in matrix.rare(values):
+            postings[feature].append(recipe_id)
+    best = {recipe_id: [] for recipe_id in chunk}
+    candidate_ids = RecipeIngredient.objects.filter(
+        ingredient_id__in=list(postings)).order_by(
+            'recipe_id').values_list('recipe_id', flat=True).distinct()
+    for batch in batches(candidate_ids.iterator(), batch_size):
+        candidates, candidate_norms = matrix.vectors(batch)
+        for candidate, values in candidates.items():
+            owners = {owner for feature in matrix.rare(values)
+                      for owner in postings.get(feature, ())}
+            owners.discard(candidate)
+            for owner in owners:
+                item = (matrix.similarity(
+                    features[owner], norms[owner], values,
+                    candidate_norms[candidate]), candidate)
+                if len(best[owner]) < limit:
+                    heapq.heappush(best[owner], item)
+                else:
+                    heapq.heappushpop(best[owner], item)
+    return {
+        recipe_id: [(candidate, score)
+                    for score, candidate in sorted(items, reverse=True)]
+        for recipe_id, items in best.items()
+    }
+
+
+def build_similar(limit=SIMILAR_LIMIT, chunk_size=500, batch_size=2000):
+    """
+    Пересчет похожих рецептов для всего каталога порциями по chunk_size
+    рецептов, каждая порция сохраняется отдельной транзакцией. В памяти
+    одновременно находятся веса признаков (по числу ингредиентов и тегов,
+    а не рецептов), векторы порции и одной пачки кандидатов.
+    """
+    matrix = FeatureMatrix().load_weights()
+    recipe_ids = Recipe.objects.order_by('pk').values_list('pk', flat=True)
+    total = recipe_ids.count()
+    done = last = 0
+    while True:
+        chunk = list(recipe_ids.filter(pk__gt=last)[:chunk_size])
+        if not chunk:
+            return
+        save_neighbours(chunk_neighbours(matrix, chunk, limit, batch_size))
+        done += len(chunk)
+        last = chunk[-1]
+        yield done, total
+
+
+def neighbourhood(recipe_ids):
+    """
+    Матрица для пересчета recipe_ids: их векторы и векторы рецептов
+    с общими ингредиентами, веса - только для признаков этих рецептов.
+    """
+    matrix = FeatureMatrix().load_weights(recipe_ids)
+    ingredient_ids = RecipeIngredient.objects.filter(
+        recipe_id__in=recipe_ids).exclude(
+            ingredient_id__in=matrix.common).values('ingredient_id')
+    candidate_ids = set(RecipeIngredient.objects.filter(
+        ingredient_id__in=ingredient_ids).values_list('recipe_id', flat=True))
+    candidate_ids.update(recipe_ids)
+    return matrix.load_weights(candidate_ids).load(candidate_ids)
+
+
+def add_neighbour(recipe_id, scores, limit=SIMILAR_LIMIT):
+    """
+    Добавление рецепта в списки похожих других рецептов: рецепт
+    вытесняет последний элемент списка, если ближе него.
+    """
+    lists = defaultdict(list)
+    for pk, owner_id, score in SimilarRecipe.objects.filter(
+            recipe_id__in=scores).values_list('pk', 'recipe_id', 'score'):
+        lists[owner_id].append((score, pk))
+    added, displaced = [], []
+    for owner_id, score in scores.items():
+        current = lists[owner_id]
+        if len(current) >= limit:
+            lowest_score, lowest_pk = min(current)
+            if score <= lowest_score:
+                continue
+            displaced.append(lowest_pk)
+        added.append(SimilarRecipe(
+            recipe_id=owner_id, similar_id=recipe_id, score=score))
+    with transaction.atomic():
+        SimilarRecipe.objects.filter(pk__in=displaced).delete()
+        SimilarRecipe.objects.bulk_create(added, ignore_conflicts=True)
+
+
+def refresh_similar(recipe_id):
+    """
+    Точечный пересчет после изменения рецепта. Его список похожих
+    строится заново; списки, в которых он уже был, тоже пересчитываются,
+    в остальные списки рецептов с общими ингредиентами он добавляется,
+    если стал ближе их последнего элемента. Веса признаков каталога
+    уточняются при полном пересчете build_similar.
+    """
+    matrix = neighbourhood([recipe_id])
+    save_neighbours({recipe_id: matrix.neighbours(recipe_id)})
+    containing = set(SimilarRecipe.objects.filter(
+        similar_id=recipe_id).values_list('recipe_id', flat=True))
+    if containing:
+        others = neighbourhood(containing)
+        save_neighbours({
+            owner_id: others.neighbours(owner_id)
+            for owner_id in containing})
+    add_neighbour(recipe_id, {
+        owner_id: score for owner_id, score in matrix.scores(recipe_id)
+        if owner_id not in containing
+    })
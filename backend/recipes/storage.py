@@ -0,0 +1,34 @@
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Хранилище, в котором имя файла - хеш SHA-256 его содержимого:
+    <каталог>/ab/cd/abcd...<расширение>. Одинаковые файлы хранятся
+    в одном экземпляре, а файл по одному адресу никогда не меняется.
+    Первые символы хеша задают подкаталоги, чтобы каталоги
+    оставались небольшими.
+    """
+
+    def hashed_name(self, name, content):
+        sha256 = hashlib.sha256()
+        for chunk in content.chunks():
+            sha256.update(chunk)
+        digest = sha256.hexdigest()
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        return os.path.join(
+            directory, digest[:2], digest[2:4], digest + extension)
+
+    def save(self, name, content, max_length=None):
+        name = self.hashed_name(name, content)
+        try:
+            # Файл снова используется: новое время изменения не дает
+            # collect_media_garbage удалить его до сохранения рецепта.
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return super().save(name, content, max_length)
+        return name.replace('\\', '/')
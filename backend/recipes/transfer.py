@@ -0,0 +1,221 @@
+import json
+import os
+import shutil
+
+from django.core.files import File
+from django.db import connection, transaction
+from django.dispatch import Signal
+from django.utils.dateparse import parse_datetime
+
+from jobs.queue import enqueue_many
+from users.models import User
+from .catalog import build_catalog
+from .documents import build_documents, rebuild_documents
+from .feed import fan_out
+from .media import delete_unreferenced, image_storage
+from .models import Ingredient, Recipe, RecipeIngredient, Tag
+from .pantry import publish_change
+from .popularity import BASE_POINTS, score
+from .similarity import refresh_similar
+
+BATCH_SIZE = 500
+RECORDS_FILE = 'recipes.ndjson'
+MEDIA_DIR = 'media'
+
+# Отправляется после загрузки порции рецептов, аргумент recipe_ids.
+recipes_imported = Signal()
+
+
+def recipe_records(batch_size=BATCH_SIZE, queryset=None):
+    """
+    Записи рецептов для выгрузки. Рецепты читаются порциями по id,
+    поэтому в памяти одновременно находится не более batch_size записей.
+    """
+    if queryset is None:
+        queryset = Recipe.objects.all()
+    last_pk = 0
+    while True:
+        recipes = list(queryset.filter(pk__gt=last_pk).order_by('pk').values(
+            'pk', 'name', 'text', 'cooking_time', 'pub_date', 'image')[
+                :batch_size])
+        if not recipes:
+            return
+        documents = build_documents([recipe['pk'] for recipe in recipes])
+        for recipe in recipes:
+            document = documents[recipe['pk']]
+            yield {
+                'name': recipe['name'],
+                'text': recipe['text'],
+                'cooking_time': recipe['cooking_time'],
+                'pub_date': recipe['pub_date'].isoformat(),
+                'image': recipe['image'],
+                'author': document['author']['email'],
+                'tags': [tag['slug'] for tag in document['tags']],
+                'ingredients': [
+                    {
+                        'name': ingredient['name'],
+                        'measurement_unit': ingredient['measurement_unit'],
+                        'amount': ingredient['amount'],
+                    }
+                    for ingredient in document['ingredients']
+                ],
+            }
+        last_pk = recipes[-1]['pk']
+
+
+def write_record(file, record):
+    file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def copy_image(name, directory):
+    """Копирование изображения рецепта из хранилища в каталог выгрузки."""
+    if not name:
+        return
+    path = os.path.join(directory, MEDIA_DIR, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with image_storage.open(name) as source, open(path, 'wb') as target:
+        shutil.copyfileobj(source, target)
+
+
+def set_pub_dates(recipes, records):
+    for recipe, record in zip(recipes, records):
+        recipe.pub_date = parse_datetime(record['pub_date'])
+        recipe.popularity = score(BASE_POINTS, recipe.pub_date)
+
+
+class RecipeImporter:
+    """
+    Загрузка рецептов порциями: рецепты, их ингредиенты и теги
+    сохраняются через bulk_create, одна порция - одна транзакция.
+    Ингредиенты ищутся в словаре (название, единица измерения) -> id,
+    недостающие ингредиенты создаются. bulk_create не отправляет
+    сигналы, поэтому их действия выполняются явно: задачи рассылки
+    по лентам и подбора похожих рецептов, снимок справочника,
+    журнал индекса подбора и сигнал recipes_imported.
+    """
+
+    def __init__(self, directory, batch_size=BATCH_SIZE):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.records = []
+        self.images = []
+        self.skipped = 0
+        self.ingredients = {
+            (name, unit): pk for pk, name, unit in
+            Ingredient.objects.values_list('pk', 'name', 'measurement_unit')
+        }
+        self.tags = dict(Tag.objects.values_list('slug', 'pk'))
+
+    def add(self, record):
+        """Добавление записи; возвращает число сохраненных рецептов."""
+        self.records.append(record)
+        if len(self.records) < self.batch_size:
+            return 0
+        return self.flush()
+
+    def add_ingredients(self, records):
+        missing = {
+            (item['name'], item['measurement_unit'])
+            for record in records for item in record['ingredients']
+        } - set(self.ingredients)
+        if not missing:
+            return
+        transaction.on_commit(build_catalog)
+        Ingredient.objects.bulk_create(
+            (Ingredient(name=name, measurement_unit=unit)
+             for name, unit in missing),
+            ignore_conflicts=True)
+        for pk, name, unit in Ingredient.objects.filter(
+                name__in={name for name, _ in missing}).values_list(
+                    'pk', 'name', 'measurement_unit'):
+            self.ingredients[name, unit] = pk
+
+    def save_image(self, name):
+        if not name:
+            return ''
+        field = Recipe._meta.get_field('image')
+        with open(os.path.join(self.directory, MEDIA_DIR, name), 'rb') as file:
+            name = image_storage.save(
+                field.generate_filename(None, os.path.basename(name)),
+                File(file))
+        self.images.append(name)
+        return name
+
+    def create_recipes(self, records, authors):
+        recipes = [
+            Recipe(
+                name=record['name'],
+                text=record['text'],
+                cooking_time=record['cooking_time'],
+                author_id=authors[record['author']],
+                image=self.save_image(record['image']),
+            )
+            for record in records
+        ]
+        if connection.features.can_return_rows_from_bulk_insert:
+            Recipe.objects.bulk_create(recipes)
+            # При создании дата публикации заменяется текущей
+            # (auto_now_add), поэтому записывается отдельно.
+            set_pub_dates(recipes, records)
+            Recipe.objects.bulk_update(recipes, ('pub_date', 'popularity'))
+        else:
+            # Без id из bulk_create рецепты сохраняются по одному как
+            # загружаемые данные (raw): auto_now_add не применяется,
+            # а получатели post_save их пропускают, потому что действия
+            # для всей порции выполняет save_batch.
+            set_pub_dates(recipes, records)
+            for recipe in recipes:
+                recipe.save_base(raw=True)
+        return recipes
+
+    def save_batch(self, records, authors):
+        """Рецепты порции со связями и задачи для них; возвращает id."""
+        self.add_ingredients(records)
+        recipes = self.create_recipes(records, authors)
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe,
+                ingredient_id=self.ingredients[
+                    item['name'], item['measurement_unit']],
+                amount=item['amount'],
+            )
+            for recipe, record in zip(recipes, records)
+            for item in record['ingredients']
+        )
+        recipe_tag = Recipe.tags.through
+        recipe_tag.objects.bulk_create(
+            recipe_tag(recipe_id=recipe.pk, tag_id=self.tags[slug])
+            for recipe, record in zip(recipes, records)
+            for slug in record['tags'] if slug in self.tags
+        )
+        recipe_ids = [recipe.pk for recipe in recipes]
+        rebuild_documents(recipe_ids)
+        for func in (fan_out, refresh_similar):
+            enqueue_many(func, ((recipe_id,) for recipe_id in recipe_ids))
+        return recipe_ids
+
+    def flush(self):
+        """Сохранение накопленной порции рецептов."""
+        records, self.records = self.records, []
+        authors = dict(User.objects.filter(
+            email__in={record['author'] for record in records}).values_list(
+                'email', 'pk'))
+        known = [record for record in records if record['author'] in authors]
+        self.skipped += len(records) - len(known)
+        if not known:
+            return 0
+        self.images = []
+        try:
+            with transaction.atomic():
+                recipe_ids = self.save_batch(known, authors)
+        except Exception:
+            # Файлы изображений не откатываются вместе с транзакцией.
+            # Одинаковые изображения хранятся в одном файле, поэтому
+            # удаляются только те, на которые не ссылаются рецепты.
+            for name in self.images:
+                delete_unreferenced(name)
+            raise
+        for recipe_id in recipe_ids:
+            publish_change(recipe_id)
+        recipes_imported.send(sender=Recipe, recipe_ids=recipe_ids)
+        return len(recipe_ids)
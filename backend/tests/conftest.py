@@ -0,0 +1,100 @@
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart, Tag)
+from users.models import Subscription, User
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def make_user(db):
+    def make_user(username, **kwargs):
+        return User.objects.create_user(
+            email=f'{username}@example.com', username=username,
+            first_name='Имя', last_name='Фамилия', password='pass12345XX',
+            **kwargs)
+    return make_user
+
+
+@pytest.fixture
+def user(make_user):
+    return make_user('user')
+
+
+@pytest.fixture
+def author(make_user):
+    return make_user('author')
+
+
+@pytest.fixture
+def superuser(make_user):
+    return make_user('admin', is_staff=True, is_superuser=True)
+
+
+@pytest.fixture
+def user_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def admin_client(superuser, client):
+    client.force_login(superuser)
+    return client
+
+
+@pytest.fixture
+def tags(db):
+    return [Tag.objects.create(name=slug, color=color, slug=slug)
+            for slug, color in (('breakfast', '#E26C2D'),
+                                ('lunch', '#49B64E'),
+                                ('dinner', '#8775D2'))]
+
+
+@pytest.fixture
+def ingredients(db):
+    return [Ingredient.objects.create(
+        name=f'Ингредиент {number}', measurement_unit='г')
+        for number in range(5)]
+
+
+@pytest.fixture
+def make_recipes(tags, ingredients):
+    """Рецепты со всеми связями, без обращения к API."""
+    def make_recipes(author, count, start=0):
+        recipes = []
+        for number in range(start, start + count):
+            recipe = Recipe.objects.create(
+                author=author, name=f'Рецепт {number}', text='Текст',
+                image='recipes/image.png', cooking_time=number % 50 + 1)
+            recipe.tags.set(tags[:number % len(tags) + 1])
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(recipe=recipe, ingredient=ingredient,
+                                 amount=number % 10 + 1)
+                for ingredient in ingredients[:number % 3 + 1])
+            recipes.append(recipe)
+        return recipes
+    return make_recipes
+
+
+@pytest.fixture
+def select_recipes():
+    """Избранное, список покупок и подписки пользователя."""
+    def select_recipes(user, recipes):
+        for model in (Favorite, ShoppingCart):
+            model.objects.bulk_create(
+                model(user=user, recipe=recipe) for recipe in recipes)
+        Subscription.objects.bulk_create(
+            Subscription(user=user, author_id=author_id)
+            for author_id in {recipe.author_id for recipe in recipes}
+            if author_id != user.pk)
+    return select_recipes
@@ -0,0 +1,20 @@
+import os
+import tempfile
+
+from foodgram.settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+MEDIA_ROOT = tempfile.mkdtemp(prefix='foodgram-tests-')
+PASSWORD_HASHERS = ('django.contrib.auth.hashers.MD5PasswordHasher',)
+SLOW_QUERY_LOG = os.path.join(MEDIA_ROOT, 'slow_queries.log')
+LOGGING['handlers']['slow_queries']['filename'] = SLOW_QUERY_LOG  # noqa: F405
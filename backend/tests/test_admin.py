@@ -0,0 +1,69 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+CHANGELISTS = (
+    '/admin/recipes/recipe/',
+    '/admin/recipes/recipeingredient/',
+    '/admin/recipes/favorite/',
+    '/admin/recipes/shoppingcart/',
+    '/admin/recipes/ingredient/',
+    '/admin/recipes/tag/',
+    '/admin/users/user/',
+    '/admin/users/subscription/',
+)
+
+
+def count_queries(client, url):
+    """Запросы к базе при повторном открытии страницы."""
+    client.get(url)
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context)
+
+
+def add_rows(make_user, make_recipes, select_recipes, start, count):
+    """Авторы с рецептами и подписчики, выбравшие их рецепты."""
+    for number in range(start, start + count):
+        author = make_user(f'author{number}')
+        reader = make_user(f'reader{number}')
+        recipes = make_recipes(author, 2, start=number * 2)
+        select_recipes(reader, recipes)
+
+
+@pytest.mark.parametrize('url', CHANGELISTS)
+def test_changelist_queries_do_not_depend_on_rows(
+        admin_client, make_user, make_recipes, select_recipes, url):
+    add_rows(make_user, make_recipes, select_recipes, 0, 2)
+    few = count_queries(admin_client, url)
+    add_rows(make_user, make_recipes, select_recipes, 2, 10)
+    assert count_queries(admin_client, url) == few
+
+
+def test_recipe_change_page_queries_do_not_depend_on_rows(
+        admin_client, make_user, make_recipes, select_recipes):
+    add_rows(make_user, make_recipes, select_recipes, 0, 1)
+    recipe = make_recipes(make_user('cook'), 1, start=100)[0]
+    url = f'/admin/recipes/recipe/{recipe.pk}/change/'
+    few = count_queries(admin_client, url)
+    add_rows(make_user, make_recipes, select_recipes, 1, 10)
+    assert count_queries(admin_client, url) == few
+
+
+def test_recipe_changelist_shows_favorite_count(
+        admin_client, make_user, make_recipes, select_recipes):
+    recipes = make_recipes(make_user('cook'), 1)
+    for number in range(3):
+        select_recipes(make_user(f'reader{number}'), recipes)
+    response = admin_client.get('/admin/recipes/recipe/')
+    assert '<td class="field-in_favorite_count">3</td>' in (
+        response.content.decode())
+
+
+def test_recipe_changelist_filters_are_bounded(admin_client, make_user,
+                                               make_recipes):
+    make_recipes(make_user('cook'), 3)
+    response = admin_client.get('/admin/recipes/recipe/')
+    filters = [spec.title for spec in response.context['cl'].filter_specs]
+    assert filters == ['Теги']
@@ -0,0 +1,28 @@
+import os
+import time
+
+from django.core.files.storage import default_storage
+
+from recipes.catalog import STALE_AFTER, build_catalog, snapshot_name
+from recipes.models import Ingredient
+
+
+def age(version):
+    """Снимок version выглядит созданным раньше срока хранения."""
+    old = time.time() - 2 * STALE_AFTER.total_seconds()
+    for name in (snapshot_name(version), f'{snapshot_name(version)}.gz'):
+        os.utime(default_storage.path(name), (old, old))
+
+
+def test_superseded_snapshot_is_kept_for_grace_period(ingredients):
+    old_version = build_catalog()
+    age(old_version)
+    Ingredient.objects.create(name='Мука', measurement_unit='г')
+    new_version = build_catalog()
+    assert new_version != old_version
+    assert default_storage.exists(snapshot_name(old_version))
+    assert default_storage.exists(f'{snapshot_name(old_version)}.gz')
+    age(old_version)
+    assert build_catalog() == new_version
+    assert not default_storage.exists(snapshot_name(old_version))
+    assert default_storage.exists(snapshot_name(new_version))
@@ -0,0 +1,117 @@
+import pytest
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.cache import FRAGMENT_VERSION_KEY, get_version
+from jobs.models import Job
+from jobs.queue import run_pending
+from recipes import deletion
+from recipes.deletion import deactivate_user, delete_recipes, delete_user
+from recipes.media import image_storage
+from recipes.models import (Favorite, FeedEntry, Recipe, RecipeIngredient,
+                            ShoppingCart)
+from users.models import Subscription, User
+
+# Изображения и кэш обновляются после фиксации транзакции.
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def recipes(author, user, make_recipes, select_recipes):
+    recipes = make_recipes(author, 3)
+    select_recipes(user, recipes)
+    select_recipes(author, make_recipes(user, 1, start=3))
+    FeedEntry.objects.bulk_create(
+        FeedEntry(user=user, recipe=recipe, pub_date=recipe.pub_date)
+        for recipe in recipes)
+    return recipes
+
+
+def test_delete_user_removes_rows(author, user, recipes):
+    Token.objects.create(user=author)
+    deactivate_user(author.pk)
+    delete_user(author.pk, batch_size=2, recipe_batch_size=2)
+    assert not User.objects.filter(pk=author.pk).exists()
+    assert not Recipe.objects.filter(author=author.pk).exists()
+    for model in (Favorite, ShoppingCart):
+        assert not model.objects.filter(user=author.pk).exists()
+        assert not model.objects.filter(recipe__in=recipes).exists()
+    assert not RecipeIngredient.objects.filter(recipe__in=recipes).exists()
+    assert not FeedEntry.objects.filter(recipe__in=recipes).exists()
+    assert not Subscription.objects.filter(author=author.pk).exists()
+    assert not Token.objects.filter(user=author.pk).exists()
+    assert Recipe.objects.filter(author=user).count() == 1
+
+
+def test_delete_user_skips_active_user(author, recipes):
+    delete_user(author.pk)
+    assert Recipe.objects.filter(author=author).count() == 3
+
+
+def test_destroy_deactivates_and_enqueues(author, superuser, recipes):
+    client = APIClient()
+    client.force_authenticate(superuser)
+    response = client.delete(
+        f'/api/users/{author.pk}/', {'current_password': 'pass12345XX'},
+        format='json')
+    assert response.status_code == 204
+    author.refresh_from_db()
+    assert not author.is_active
+    job = Job.objects.get(task='recipes.deletion.delete_user')
+    assert job.args == [author.pk]
+
+
+def test_interrupted_delete_recipes_hides_and_resumes(recipes, monkeypatch):
+    recipe_ids = [recipe.pk for recipe in recipes]
+    delete_batches = deletion.delete_batches
+
+    def failing(queryset, batch_size):
+        if queryset.model is Recipe:
+            raise RuntimeError('сбой')
+        return delete_batches(queryset, batch_size)
+
+    monkeypatch.setattr(deletion, 'delete_batches', failing)
+    with pytest.raises(RuntimeError):
+        delete_recipes(recipe_ids)
+    assert not Recipe.objects.filter(pk__in=recipe_ids).exists()
+    assert Recipe.all_objects.filter(pk__in=recipe_ids).count() == 3
+    monkeypatch.undo()
+    delete_recipes(recipe_ids)
+    assert not Recipe.all_objects.filter(pk__in=recipe_ids).exists()
+    assert not Favorite.objects.filter(recipe__in=recipe_ids).exists()
+
+
+def test_destroy_recipe_hides_and_enqueues(author, recipes):
+    recipe = recipes[0]
+    client = APIClient()
+    client.force_authenticate(author)
+    assert client.get(f'/api/recipes/{recipe.pk}/').status_code == 200
+    assert client.delete(f'/api/recipes/{recipe.pk}/').status_code == 204
+    assert client.get(f'/api/recipes/{recipe.pk}/').status_code == 404
+    assert recipe.pk not in {
+        item['id'] for item in client.get('/api/recipes/').data['results']}
+    assert Favorite.objects.filter(recipe=recipe).exists()
+    job = Job.objects.get(task='recipes.deletion.delete_recipes')
+    assert job.args == [[recipe.pk]]
+    run_pending()
+    assert not Recipe.all_objects.filter(pk=recipe.pk).exists()
+    assert not Favorite.objects.filter(recipe=recipe.pk).exists()
+
+
+def test_delete_recipes_cleans_cache_and_images(user_client, author,
+                                                recipes):
+    recipe = recipes[0]
+    name = image_storage.save(
+        'recipes/image.png', ContentFile(b'image', name='image.png'))
+    Recipe.objects.filter(author=author).update(image=name)
+    assert user_client.get(f'/api/recipes/{recipe.pk}/').status_code == 200
+    key = (f'recipe_fragment_{get_version(FRAGMENT_VERSION_KEY)}_'
+           f'{recipe.pk}')
+    assert cache.get(key) is not None
+    delete_recipes([recipe.pk])
+    assert cache.get(key) is None
+    assert image_storage.exists(name)
+    delete_recipes([other.pk for other in recipes[1:]])
+    assert not image_storage.exists(name)
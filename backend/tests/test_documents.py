@@ -0,0 +1,86 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from jobs.queue import run_pending
+from recipes.documents import build_documents
+from recipes.models import Recipe, RecipeIngredient
+
+# Документы пересобираются после фиксации транзакции.
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def recipe(author, make_recipes):
+    recipe = make_recipes(author, 1)[0]
+    recipe.document = build_documents([recipe.pk])[recipe.pk]
+    recipe.save(update_fields=('document',))
+    return recipe
+
+
+def stored_document(recipe):
+    return Recipe.objects.get(pk=recipe.pk).document
+
+
+def test_ingredient_amount_updates_document(recipe):
+    item = RecipeIngredient.objects.get(recipe=recipe)
+    item.amount = 99
+    item.save()
+    assert stored_document(recipe)['ingredients'][0]['amount'] == 99
+
+
+def test_ingredient_removal_updates_document(recipe):
+    RecipeIngredient.objects.get(recipe=recipe).delete()
+    assert stored_document(recipe)['ingredients'] == []
+
+
+def test_tags_update_document(recipe, tags):
+    recipe.tags.set(tags)
+    assert [tag['slug'] for tag in stored_document(recipe)['tags']] == [
+        tag.slug for tag in tags]
+    tags[2].recipes.remove(recipe)
+    assert len(stored_document(recipe)['tags']) == 2
+
+
+def test_author_name_updates_document_in_background(author, recipe):
+    author.first_name = 'Новое имя'
+    author.save()
+    assert stored_document(recipe)['author']['first_name'] == 'Имя'
+    run_pending()
+    assert stored_document(recipe)['author']['first_name'] == 'Новое имя'
+
+
+def test_tag_rename_updates_documents_in_background(recipe):
+    tag = recipe.tags.get()
+    tag.name = 'Завтрак'
+    tag.save()
+    assert stored_document(recipe)['tags'][0]['name'] == tag.slug
+    run_pending()
+    assert stored_document(recipe)['tags'][0]['name'] == 'Завтрак'
+
+
+def test_ingredient_rename_updates_documents_in_background(recipe):
+    ingredient = recipe.ingredients.get()
+    ingredient.name = 'Мука'
+    ingredient.save()
+    run_pending()
+    assert stored_document(recipe)['ingredients'][0]['name'] == 'Мука'
+
+
+def test_tag_deletion_updates_documents_in_background(recipe):
+    recipe.tags.get().delete()
+    run_pending()
+    assert stored_document(recipe)['tags'] == []
+
+
+@pytest.mark.parametrize('field, value', (
+    ('last_login', '2024-01-01T00:00:00Z'),
+    ('role', 'Admin'),
+    ('first_name', 'Имя'),
+))
+def test_other_user_changes_keep_documents(author, recipe, field, value):
+    setattr(author, field, value)
+    with CaptureQueriesContext(connection) as context:
+        author.save()
+    assert not any('recipes_recipe' in query['sql']
+                   for query in context.captured_queries)
@@ -0,0 +1,114 @@
+import io
+import json
+import zipfile
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import AsyncClient
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.media import image_storage
+from recipes.models import Recipe
+from recipes.transfer import MEDIA_DIR, RECORDS_FILE
+
+# Асинхронный обработчик читает базу из потоков пула.
+pytestmark = pytest.mark.django_db(transaction=True)
+
+PNG = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c63f8cfc0f01f0005000201a5f4f4'
+    'b70000000049454e44ae426082')
+
+
+def read_ndjson(archive, name):
+    return [json.loads(line) for line in archive.read(name).splitlines()]
+
+
+def summarize(recipes):
+    """Поля рецептов, которые должны пережить выгрузку и загрузку."""
+    return {
+        recipe.name: (recipe.text, recipe.cooking_time,
+                      set(recipe.tags.values_list('slug', flat=True)),
+                      set(recipe.recipeIngredient.values_list(
+                          'ingredient__name', 'amount')))
+        for recipe in recipes}
+
+
+@pytest.fixture
+def recipes(user, author, make_recipes, select_recipes):
+    image = image_storage.save('recipes/photo.png', ContentFile(PNG))
+    own = make_recipes(user, 3)
+    Recipe.objects.filter(pk__in=[recipe.pk for recipe in own]).update(
+        image=image)
+    select_recipes(user, make_recipes(author, 2, start=3))
+    return own
+
+
+async def async_get(path, **headers):
+    return await AsyncClient().get(path, **headers)
+
+
+def download(client):
+    response = client.get('/api/users/export/')
+    assert response.status_code == 200
+    assert response.streaming
+    assert 'foodgram-export.zip' in response['Content-Disposition']
+    return zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+
+
+def test_export_contents(user, user_client, recipes):
+    archive = download(user_client)
+    assert archive.testzip() is None
+    image = Recipe.objects.get(pk=recipes[0].pk).image.name
+    assert f'{MEDIA_DIR}/{image}' in archive.namelist()
+    assert archive.read(f'{MEDIA_DIR}/{image}') == PNG
+    assert read_ndjson(archive, 'user.ndjson') == [{
+        'email': user.email, 'username': user.username,
+        'first_name': user.first_name, 'last_name': user.last_name,
+    }]
+    exported = read_ndjson(archive, RECORDS_FILE)
+    assert sorted(record['name'] for record in exported) == [
+        recipe.name for recipe in recipes]
+    for name in ('favorites.ndjson', 'shopping_cart.ndjson'):
+        assert {record['author'] for record in read_ndjson(
+            archive, name)} == {'author@example.com'}
+        assert len(read_ndjson(archive, name)) == 2
+    assert read_ndjson(archive, 'subscriptions.ndjson') == [
+        {'email': 'author@example.com', 'username': 'author'}]
+
+
+def test_export_round_trip(user, user_client, recipes, tmp_path):
+    """Распакованный архив загружается командой import_recipes."""
+    download(user_client).extractall(tmp_path)
+    expected = summarize(Recipe.objects.filter(author=user))
+    Recipe.objects.filter(author=user).delete()
+    image_storage.delete('recipes/photo.png')
+    call_command('import_recipes', str(tmp_path), stdout=io.StringIO())
+    imported = Recipe.objects.filter(author=user)
+    assert summarize(imported) == expected
+    for recipe in imported:
+        with image_storage.open(recipe.image.name) as file:
+            assert file.read() == PNG
+
+
+def test_export_requires_authentication(db):
+    response = APIClient().get('/api/users/export/')
+    assert response.status_code == 401
+
+
+def test_export_asgi(user, recipes, settings):
+    """Под ASGI архив отдается из временного файла."""
+    settings.ROOT_URLCONF = 'foodgram.asgi_urls'
+    token = Token.objects.create(user=user)
+    response = async_to_sync(async_get)(
+        '/api/users/export/', authorization=f'Token {token.key}')
+    assert response.status_code == 200
+    archive = zipfile.ZipFile(io.BytesIO(b''.join(
+        response.streaming_content)))
+    assert archive.testzip() is None
+    assert len(read_ndjson(archive, RECORDS_FILE)) == len(recipes)
+    unauthorized = async_to_sync(async_get)('/api/users/export/')
+    assert unauthorized.status_code == 401
@@ -0,0 +1,142 @@
+from django.contrib.auth.models import AnonymousUser
+from hypothesis import given, settings
+from hypothesis import strategies as st
+from hypothesis.extra.django import TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.fast_serializers import (recipe_rows, represent_recipes,
+                                  represent_users, user_rows)
+from api.serializers import CustomUserSerializer, RecipeReadSerializer
+from recipes.documents import rebuild_documents
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart, Tag)
+from users.models import Subscription, User
+
+# Без символов, которые PostgreSQL не хранит в текстовых полях.
+TEXT = st.text(
+    st.characters(blacklist_categories=('Cs',), blacklist_characters='\x00'),
+    min_size=1, max_size=50)
+RECIPE = st.fixed_dictionaries({
+    'name': TEXT,
+    'text': TEXT,
+    'cooking_time': st.integers(1, 32767),
+    'image': st.sampled_from(('', 'recipes/ab/cd/abcd.png')),
+    'author': st.integers(0, 2),
+    'tags': st.sets(st.integers(0, 2)),
+    'ingredients': st.dictionaries(
+        st.integers(0, 3), st.integers(1, 32767), max_size=4),
+    'favorited': st.booleans(),
+    'in_cart': st.booleans(),
+})
+USER = st.fixed_dictionaries({
+    'username': st.from_regex(r'[\w.@+-]{1,20}', fullmatch=True),
+    'first_name': TEXT,
+    'last_name': TEXT,
+})
+
+
+def make_request(user):
+    request = Request(APIRequestFactory().get('/'))
+    request.user = user or AnonymousUser()
+    return request
+
+
+def as_dicts(items):
+    return [dict(item) for item in items]
+
+
+class FastSerializersTest(TestCase):
+    """
+    Представления из values() (api/fast_serializers.py) совпадают
+    с выводом сериализаторов DRF при любых данных и наборах полей.
+    """
+
+    def make_users(self, users):
+        return [
+            User.objects.create_user(
+                email=f'user{number}@example.com',
+                username=f'{data["username"]}{number}',
+                first_name=data['first_name'], last_name=data['last_name'],
+                password='pass12345XX')
+            for number, data in enumerate(users)
+        ]
+
+    def make_recipes(self, recipes, authors, reader):
+        tags = [Tag.objects.create(name=f'Тег {number}', slug=f'tag{number}',
+                                   color=f'#00000{number}')
+                for number in range(3)]
+        ingredients = [Ingredient.objects.create(
+            name=f'Ингредиент {number}', measurement_unit='г')
+            for number in range(4)]
+        for data in recipes:
+            recipe = Recipe.objects.create(
+                author=authors[data['author']], name=data['name'],
+                text=data['text'], cooking_time=data['cooking_time'],
+                image=data['image'])
+            recipe.tags.set([tags[number] for number in data['tags']])
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(recipe=recipe, ingredient=ingredients[number],
+                                 amount=amount)
+                for number, amount in data['ingredients'].items())
+            if data['favorited']:
+                Favorite.objects.create(user=reader, recipe=recipe)
+            if data['in_cart']:
+                ShoppingCart.objects.create(user=reader, recipe=recipe)
+
+    def subscribe(self, reader, authors, subscriptions):
+        for author, subscribed in zip(authors, subscriptions):
+            if subscribed and author != reader:
+                Subscription.objects.create(user=reader, author=author)
+
+    @settings(max_examples=40, deadline=None)
+    @given(
+        recipes=st.lists(RECIPE, min_size=1, max_size=5),
+        fields=st.sets(st.sampled_from(RecipeReadSerializer.Meta.fields),
+                       min_size=1),
+        subscriptions=st.lists(st.booleans(), min_size=3, max_size=3),
+        reader=st.sampled_from((None, 0, 3)),
+        documents=st.booleans(),
+    )
+    def test_recipes(self, recipes, fields, subscriptions, reader,
+                     documents):
+        authors = self.make_users([
+            {'username': 'user', 'first_name': 'Имя', 'last_name': 'Ф'}] * 4)
+        user = None if reader is None else authors[reader]
+        self.make_recipes(recipes, authors, user or authors[3])
+        self.subscribe(user or authors[3], authors[:3], subscriptions)
+        if documents:
+            rebuild_documents(Recipe.objects.values_list('pk', flat=True))
+        request = make_request(user)
+        queryset = RecipeReadSerializer.prepare_queryset(
+            Recipe.objects.order_by('-pub_date', '-pk'), request, fields)
+        expected = RecipeReadSerializer(
+            queryset, many=True, fields=fields,
+            context={'request': request}).data
+        self.assertEqual(
+            as_dicts(represent_recipes(
+                recipe_rows(queryset, fields), fields, request)),
+            as_dicts(expected))
+
+    @settings(max_examples=40, deadline=None)
+    @given(
+        users=st.lists(USER, min_size=1, max_size=5),
+        fields=st.sets(st.sampled_from(CustomUserSerializer.Meta.fields),
+                       min_size=1),
+        subscriptions=st.lists(st.booleans(), min_size=5, max_size=5),
+        authenticated=st.booleans(),
+    )
+    def test_users(self, users, fields, subscriptions, authenticated):
+        reader, *authors = self.make_users(users + [
+            {'username': 'reader', 'first_name': 'Имя', 'last_name': 'Ф'}])[
+                ::-1]
+        self.subscribe(reader, authors, subscriptions)
+        request = make_request(reader if authenticated else None)
+        queryset = CustomUserSerializer.prepare_queryset(
+            User.objects.order_by('pk'), request, fields)
+        expected = CustomUserSerializer(
+            queryset, many=True, fields=fields,
+            context={'request': request}).data
+        self.assertEqual(
+            as_dicts(represent_users(user_rows(queryset, fields), fields)),
+            as_dicts(expected))
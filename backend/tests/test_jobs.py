@@ -0,0 +1,125 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from jobs import queue
+from jobs.models import Job
+from jobs.queue import (Worker, backoff, claim, enqueue, enqueue_many,
+                        enqueue_on_commit, heartbeat, requeue_stale,
+                        run_pending)
+
+calls = []
+
+
+def record(*args):
+    calls.append(args)
+
+
+def fail(*args):
+    raise RuntimeError('ошибка задачи')
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    calls.clear()
+
+
+def test_run_pending_runs_and_deletes_jobs(db):
+    enqueue(record, 1, 'a')
+    enqueue_many(record, ((2,), (3,)))
+    assert run_pending() == 3
+    assert sorted(calls) == [(1, 'a'), (2,), (3,)]
+    assert not Job.objects.exists()
+
+
+def test_delayed_job_waits(db):
+    enqueue(record, 1, delay=60)
+    assert run_pending() == 0
+    assert calls == []
+
+
+def test_enqueue_on_commit(db, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=False) as callbacks:
+        enqueue_on_commit(record, 1)
+    assert not Job.objects.exists()
+    callbacks[0]()
+    assert Job.objects.get().task == 'tests.test_jobs.record'
+
+
+def test_failed_job_is_retried_with_backoff(db):
+    enqueue(fail, max_attempts=2)
+    started = timezone.now()
+    assert run_pending() == 1
+    job = Job.objects.get()
+    assert job.status == Job.QUEUED
+    assert job.attempts == 1
+    assert job.run_at >= started + timedelta(seconds=queue.BACKOFF_BASE / 2)
+    assert 'ошибка задачи' in job.error
+    Job.objects.update(run_at=timezone.now())
+    assert run_pending() == 1
+    job.refresh_from_db()
+    assert job.status == Job.FAILED
+    assert job.attempts == 2
+    assert run_pending() == 0
+
+
+@pytest.mark.parametrize('attempts', (1, 3, 20))
+def test_backoff_grows_up_to_limit(attempts):
+    delay = min(queue.BACKOFF_BASE * 2 ** (attempts - 1), queue.BACKOFF_MAX)
+    for _ in range(20):
+        seconds = backoff(attempts).total_seconds()
+        assert delay * 0.5 <= seconds <= delay * 1.5
+
+
+def test_requeue_stale_skips_jobs_with_heartbeat(db):
+    enqueue(record, 1)
+    enqueue(record, 2)
+    alive, stale = claim(2)
+    Job.objects.update(
+        started=timezone.now() - timedelta(hours=2),
+        heartbeat=timezone.now() - queue.STALE_AFTER * 2)
+    heartbeat([alive.pk])
+    assert requeue_stale() == 1
+    assert Job.objects.get(pk=alive.pk).status == Job.RUNNING
+    assert Job.objects.get(pk=stale.pk).status == Job.QUEUED
+
+
+def test_requeue_stale_fails_job_after_max_attempts(db):
+    """Задача, каждый раз роняющая воркер, не повторяется бесконечно."""
+    enqueue(record, 1, max_attempts=2)
+    for attempt in (1, 2):
+        job = claim()[0]
+        assert job.attempts == attempt
+        Job.objects.update(heartbeat=timezone.now() - queue.STALE_AFTER * 2)
+        assert requeue_stale() == 1
+    job.refresh_from_db()
+    assert job.status == Job.FAILED
+    assert job.error == queue.STALE_ERROR
+    assert claim() == []
+
+
+def test_worker_beat_marks_running_jobs(db):
+    enqueue(record, 1)
+    job = claim()[0]
+    Job.objects.update(heartbeat=timezone.now() - queue.STALE_AFTER * 2)
+    worker = Worker()
+    worker.running.add(job.pk)
+    worker.beat()
+    job.refresh_from_db()
+    assert job.status == Job.RUNNING
+    assert job.heartbeat > timezone.now() - queue.STALE_AFTER
+
+
+@pytest.mark.django_db(transaction=True)
+def test_burst_worker_processes_queue():
+    enqueue_many(record, ((number,) for number in range(5)))
+    enqueue(fail, max_attempts=1)
+    # SQLite в тестах блокирует таблицу целиком, поэтому без SKIP LOCKED
+    # несколько потоков мешали бы друг другу; хватает одного.
+    worker = Worker(poll_interval=0.01, burst=True)
+    worker.start()
+    assert worker.processed == 6
+    assert worker.failed == 1
+    assert sorted(calls) == [(number,) for number in range(5)]
+    assert Job.objects.get().status == Job.FAILED
@@ -0,0 +1,34 @@
+import os
+import time
+
+from django.core.files.base import ContentFile
+
+from recipes.media import collect_garbage, image_storage
+
+DAY = 24 * 60 * 60
+
+
+def save_old(data):
+    name = image_storage.save('recipes/image.png', ContentFile(data))
+    old = time.time() - 2 * DAY
+    os.utime(image_storage.path(name), (old, old))
+    return name
+
+
+def collect():
+    return [entry.path for batch in collect_garbage(DAY) for entry in batch]
+
+
+def test_old_unreferenced_image_is_collected(db):
+    name = save_old(b'old image')
+    assert collect() == [image_storage.path(name)]
+    assert not image_storage.exists(name)
+
+
+def test_reused_image_is_not_collected(db):
+    """Повторно загруженный файл не удаляется до сохранения рецепта."""
+    name = save_old(b'reused image')
+    assert image_storage.save(
+        'recipes/other.png', ContentFile(b'reused image')) == name
+    assert collect() == []
+    assert image_storage.exists(name)
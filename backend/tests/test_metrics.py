@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from prometheus_client.parser import text_string_to_metric_families
+
+SCRAPE = '''
+import django
+django.setup()
+from django.test import Client
+response = Client().get('/metrics')
+assert response.status_code == 200, response.status_code
+print(response.content.decode())
+'''
+
+
+def scrape(client):
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/plain')
+    return response.content.decode()
+
+
+def sample(text, name, **labels):
+    """Значение метрики с указанными метками из вывода /metrics."""
+    for family in text_string_to_metric_families(text):
+        for item in family.samples:
+            if item.name == name and item.labels == labels:
+                return item.value
+    return 0
+
+
+def test_request_duration_by_viewset_action(client, db):
+    before = sample(
+        scrape(client), 'foodgram_http_request_duration_seconds_count',
+        view='RecipeViewSet', action='list', method='GET', status='200')
+    assert client.get('/api/recipes/').status_code == 200
+    after = sample(
+        scrape(client), 'foodgram_http_request_duration_seconds_count',
+        view='RecipeViewSet', action='list', method='GET', status='200')
+    assert after == before + 1
+
+
+def test_database_queries_are_counted(client, db):
+    before = sample(
+        scrape(client), 'foodgram_db_queries_total', alias='default')
+    client.get('/api/recipes/')
+    after = sample(
+        scrape(client), 'foodgram_db_queries_total', alias='default')
+    assert after > before
+
+
+def test_worker_identity(client):
+    assert 'foodgram_worker_start_time_seconds' in scrape(client)
+
+
+def test_multiprocess_scrape_creates_directory(tmp_path):
+    """
+    Каталог метрик создается при импорте, если переменная задана
+    процессу, запущенному не из gunicorn.
+    """
+    path = tmp_path / 'missing' / 'prometheus'
+    result = subprocess.run(
+        (sys.executable, '-c', SCRAPE),
+        cwd=settings.BASE_DIR, capture_output=True, text=True,
+        env={**os.environ, 'PROMETHEUS_MULTIPROC_DIR': str(path),
+             'DJANGO_SETTINGS_MODULE': 'tests.settings'})
+    assert result.returncode == 0, result.stderr
+    assert 'foodgram_worker_start_time_seconds' in result.stdout
+    assert any(path.iterdir())
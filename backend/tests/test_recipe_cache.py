@@ -0,0 +1,64 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncClient
+from rest_framework.test import APIClient
+
+from api.cache import FRAGMENT_VERSION_KEY, get_version
+
+# Кэш сбрасывается после фиксации транзакции.
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def recipe(author, make_recipes):
+    return make_recipes(author, 1)[0]
+
+
+def fragment_cached(recipe_id):
+    return cache.get(
+        f'recipe_fragment_{get_version(FRAGMENT_VERSION_KEY)}_{recipe_id}')
+
+
+def wsgi_get(path):
+    return APIClient().get(path)
+
+
+@async_to_sync
+async def asgi_get(path):
+    return await AsyncClient().get(path)
+
+
+@pytest.fixture(params=(wsgi_get, asgi_get), ids=('wsgi', 'asgi'))
+def get(request, settings):
+    if request.param is asgi_get:
+        settings.ROOT_URLCONF = 'foodgram.asgi_urls'
+    return request.param
+
+
+def test_retrieve_caches_fragment(get, recipe):
+    response = get(f'/api/recipes/{recipe.pk}/')
+    assert response.status_code == 200
+    assert response.json()['name'] == recipe.name
+    assert fragment_cached(recipe.pk)['name'] == recipe.name
+
+
+def test_cached_retrieve_does_not_query(
+        recipe, django_assert_num_queries):
+    wsgi_get(f'/api/recipes/{recipe.pk}/')
+    with django_assert_num_queries(0):
+        response = wsgi_get(f'/api/recipes/{recipe.pk}/')
+    assert response.status_code == 200
+
+
+def test_retrieve_deleted_recipe(get, recipe):
+    recipe_id = recipe.pk
+    assert get(f'/api/recipes/{recipe_id}/').status_code == 200
+    recipe.delete()
+    assert fragment_cached(recipe_id) is None
+    assert get(f'/api/recipes/{recipe_id}/').status_code == 404
+
+
+def test_retrieve_unknown_recipe(get, db):
+    assert get('/api/recipes/12345/').status_code == 404
+    assert get('/api/recipes/abc/').status_code == 404
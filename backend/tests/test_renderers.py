@@ -0,0 +1,16 @@
+import pytest
+
+from api.renderers import ORJSONRenderer
+
+
+def test_non_string_keys():
+    assert ORJSONRenderer().render({0: ['Ошибка']}) == (
+        '{"0":["Ошибка"]}'.encode())
+
+
+@pytest.mark.django_db
+def test_list_field_error_is_bad_request(user_client):
+    response = user_client.get(
+        '/api/recipes/pantry/', {'ingredients': ['1', 'abc']})
+    assert response.status_code == 400
+    assert list(response.json()['ingredients']) == ['1']
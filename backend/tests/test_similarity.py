@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient, SimilarRecipe
+from recipes.similarity import FeatureMatrix, build_similar
+
+
+@pytest.fixture
+def catalog(author, tags):
+    rng = random.Random(0)
+    ingredients = [Ingredient.objects.create(
+        name=f'Ингредиент {number}', measurement_unit='г')
+        for number in range(30)]
+    for number in range(60):
+        recipe = Recipe.objects.create(
+            author=author, name=f'Рецепт {number}', text='Текст',
+            image='recipes/image.png', cooking_time=10)
+        recipe.tags.set(rng.sample(tags, rng.randint(1, len(tags))))
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=1)
+            for ingredient in rng.sample(ingredients, rng.randint(1, 6)))
+
+
+def stored_scores():
+    scores = {}
+    for recipe_id, score in SimilarRecipe.objects.values_list(
+            'recipe_id', 'score'):
+        scores.setdefault(recipe_id, []).append(round(score, 9))
+    return {recipe_id: sorted(values) for recipe_id, values in scores.items()}
+
+
+def test_chunked_build_matches_full_catalog(catalog):
+    """Порции и пачки кандидатов не меняют результат пересчета."""
+    matrix = FeatureMatrix().load_weights().load()
+    expected = {}
+    for recipe_id in matrix.features:
+        scores = sorted(
+            round(score, 9) for _, score in matrix.neighbours(recipe_id, 5))
+        if scores:
+            expected[recipe_id] = scores
+    assert list(build_similar(5, chunk_size=7, batch_size=4))[-1] == (60, 60)
+    assert stored_scores() == expected
@@ -0,0 +1,83 @@
+import gzip
+import json
+import logging
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from api import slow_queries
+from api.slow_queries import fingerprint, log_query
+
+SQL = ('SELECT "recipes_tag"."id" FROM "recipes_tag" '
+       'WHERE "recipes_tag"."id" IN (%s, %s)')
+
+
+@pytest.fixture
+def explained(monkeypatch):
+    explained = set()
+    monkeypatch.setattr(slow_queries, 'explained', explained)
+    return explained
+
+
+@pytest.fixture
+def caplog(caplog):
+    """Журнал медленных запросов не передает записи корневому логгеру."""
+    logger = logging.getLogger('foodgram.slow_queries')
+    logger.addHandler(caplog.handler)
+    yield caplog
+    logger.removeHandler(caplog.handler)
+
+
+def logged(caplog):
+    return [json.loads(record.getMessage()) for record in caplog.records
+            if record.name == 'foodgram.slow_queries']
+
+
+def test_fingerprint_ignores_in_list_length_and_numbers():
+    assert fingerprint(SQL) == fingerprint(
+        SQL.replace('(%s, %s)', '(%s, %s, %s, %s)'))
+    assert fingerprint('SELECT 1 LIMIT 20') == fingerprint(
+        'SELECT 1 LIMIT 40')
+    assert fingerprint(SQL) != fingerprint(SQL.replace('"id" IN', '"slug" IN'))
+
+
+def test_plan_is_logged_once_per_fingerprint(db, caplog, explained):
+    log_query(connection, SQL, (1, 2), False, 0.5)
+    log_query(connection, SQL, (3, 4), False, 0.5)
+    first, second = logged(caplog)
+    assert first['fingerprint'] == second['fingerprint']
+    assert first['duration_ms'] == 500
+    assert first['params'] == [1, 2]
+    assert first['plan']
+    assert 'plan' not in second
+    assert any('test_slow_queries.py' in frame for frame in first['stack'])
+
+
+def test_no_explain_when_fingerprints_are_full(
+        db, caplog, explained, monkeypatch):
+    monkeypatch.setattr(slow_queries, 'EXPLAINED_LIMIT', 1)
+    explained.add('other')
+
+    def explain(*args):
+        raise AssertionError('EXPLAIN при заполненном наборе отпечатков')
+
+    monkeypatch.setattr(slow_queries, 'explain', explain)
+    log_query(connection, SQL, (1, 2), False, 0.5)
+    assert 'plan' not in logged(caplog)[0]
+
+
+def test_report_reads_rotated_logs(tmp_path, capsys):
+    path = tmp_path / 'slow_queries.log'
+    entry = {
+        'time': '2024-01-01T00:00:00', 'fingerprint': 'abc',
+        'duration_ms': 100, 'sql': SQL, 'stack': ['api/views.py:1 list'],
+        'plan': ['SCAN recipes_tag'],
+    }
+    path.write_text(json.dumps(entry) + '\n')
+    with gzip.open(f'{path}.2.gz', 'wt') as file:
+        file.write(json.dumps(dict(entry, duration_ms=300)) + '\n')
+    call_command('slow_query_report', log=str(path), plans=True)
+    output = capsys.readouterr().out
+    assert 'abc: 2 раз, всего 400 мс' in output
+    assert '| SCAN recipes_tag' in output
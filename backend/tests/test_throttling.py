@@ -0,0 +1,18 @@
+from rest_framework.throttling import SimpleRateThrottle
+
+from api.metrics import THROTTLE_REJECTED
+
+
+def rejected(scope, action):
+    return THROTTLE_REJECTED.labels(scope, action)._value.get()
+
+
+def test_rejected_request_is_counted_in_metric(user_client, monkeypatch):
+    monkeypatch.setitem(SimpleRateThrottle.THROTTLE_RATES, 'user', '2/min')
+    before = rejected('user', 'list')
+    for _ in range(2):
+        assert user_client.get('/api/tags/').status_code == 200
+    response = user_client.get('/api/tags/')
+    assert response.status_code == 429
+    assert int(response['Retry-After']) > 0
+    assert rejected('user', 'list') == before + 1
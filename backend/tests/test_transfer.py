@@ -0,0 +1,95 @@
+import json
+from collections import Counter
+
+import pytest
+from django.core.files.storage import default_storage
+from django.db import IntegrityError
+
+from jobs.models import Job
+from recipes.catalog import current_version
+from recipes.media import image_storage
+from recipes.models import Ingredient, Recipe
+from recipes.transfer import MEDIA_DIR, RecipeImporter
+
+# Действия после фиксации транзакции проверяются на настоящих коммитах.
+pytestmark = pytest.mark.django_db(transaction=True)
+
+PNG = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c63f8cfc0f01f0005000201a5f4f4'
+    'b70000000049454e44ae426082')
+
+
+def make_record(author, name, image='', amount=2):
+    return {
+        'name': name,
+        'text': 'Текст',
+        'cooking_time': 10,
+        'pub_date': '2024-01-01T12:00:00+00:00',
+        'image': image,
+        'author': author.email,
+        'tags': ['breakfast'],
+        'ingredients': [
+            {'name': 'Новый ингредиент', 'measurement_unit': 'шт',
+             'amount': amount},
+        ],
+    }
+
+
+@pytest.fixture
+def directory(tmp_path):
+    (tmp_path / MEDIA_DIR).mkdir()
+    return tmp_path
+
+
+def add_image(directory, name, data):
+    (directory / MEDIA_DIR / name).write_bytes(data)
+    return name
+
+
+def test_import_runs_side_effects(author, tags, directory):
+    importer = RecipeImporter(str(directory), batch_size=10)
+    for number in range(3):
+        importer.add(make_record(author, f'Рецепт {number}'))
+    assert importer.flush() == 3
+    recipe_ids = set(Recipe.objects.values_list('pk', flat=True))
+    jobs = Counter(
+        (job.task, job.args[0]) for job in Job.objects.filter(task__in=(
+            'recipes.feed.fan_out', 'recipes.similarity.refresh_similar')))
+    # Каждый рецепт обрабатывается один раз, в том числе на базах,
+    # где рецепты сохраняются по одному (SQLite).
+    assert jobs == Counter(
+        (task, pk) for pk in recipe_ids
+        for task in ('recipes.feed.fan_out',
+                     'recipes.similarity.refresh_similar'))
+    assert {recipe.pub_date.year for recipe in Recipe.objects.all()} == {
+        2024}
+    ingredient = Ingredient.objects.get(name='Новый ингредиент')
+    catalog = default_storage.open(
+        f'catalog/ingredients.{current_version()}.json').read()
+    assert ingredient.pk in [item['id'] for item in json.loads(catalog)]
+
+
+def test_failed_batch_removes_new_images(author, tags, directory):
+    importer = RecipeImporter(str(directory), batch_size=10)
+    importer.add(make_record(
+        author, 'Рецепт', add_image(directory, 'new.png', PNG + b'new')))
+    importer.add(make_record(author, 'Ошибка', amount=-1))
+    with pytest.raises(IntegrityError):
+        importer.flush()
+    assert not Recipe.objects.exists()
+    assert importer.images
+    assert not any(image_storage.exists(name) for name in importer.images)
+
+
+def test_failed_batch_keeps_shared_images(author, tags, directory):
+    importer = RecipeImporter(str(directory), batch_size=10)
+    importer.add(make_record(
+        author, 'Рецепт', add_image(directory, 'old.png', PNG)))
+    importer.flush()
+    image = Recipe.objects.get().image.name
+    importer.add(make_record(author, 'Копия', 'old.png'))
+    importer.add(make_record(author, 'Ошибка', amount=-1))
+    with pytest.raises(IntegrityError):
+        importer.flush()
+    assert image_storage.exists(image)
@@ -10,17 +10,20 @@ class UserAdmin(admin.ModelAdmin):
         'last_name', 'email', 'role'
     )
     list_display_links = ('username',)
-    list_filter = ('email', 'username')
-    search_fields = ('username',)
+    list_filter = ('role', 'is_staff', 'is_active')
+    search_fields = ('username', 'email')
     ordering = ('id',)
+    show_full_result_count = False
 
 
 @admin.register(Subscription)
 class SubscriptionAdmin(admin.ModelAdmin):
     list_display = ('user', 'author')
-    list_filter = ('user',)
+    list_select_related = ('user', 'author')
     search_fields = ('user__username', 'author__username')
+    autocomplete_fields = ('user', 'author')
     ordering = ('user__id', 'author__id')
+    show_full_result_count = False
 
 
 admin.site.site_header = 'FOODGRAM'
@@ -0,0 +1,107 @@
+"""
+Нагрузочное тестирование API по docs/openapi-schema.yml.
+
+    python -m loadtest --base-url http://localhost:8000 --concurrency 50
+
+Данные для теста создает команда seed_loadtest_data.
+"""
+import argparse
+import asyncio
+import random
+import time
+from pathlib import Path
+
+import aiohttp
+
+from .client import Client, Stats
+from .scenarios import SCENARIOS, Data
+from .schema import Schema
+
+SCHEMA = Path(__file__).resolve().parent.parent / 'docs' / 'openapi-schema.yml'
+EMAIL = 'loadtest{}@example.com'
+
+
+def parse_weights(value):
+    """Веса сценариев в виде browse=50,download=0."""
+    weights = {name: weight for name, (_, weight) in SCENARIOS.items()}
+    for item in filter(None, value.split(',')):
+        name, _, weight = item.partition('=')
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f'Неизвестный сценарий {name}')
+        weights[name] = int(weight)
+    return weights
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog='python -m loadtest', description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--schema', default=str(SCHEMA))
+    parser.add_argument(
+        '--concurrency', type=int, default=20,
+        help='Количество одновременно работающих виртуальных пользователей')
+    parser.add_argument(
+        '--duration', type=float, default=60, help='Длительность, секунды')
+    parser.add_argument(
+        '--users', type=int, default=100,
+        help='Количество пользователей, созданных seed_loadtest_data')
+    parser.add_argument('--password', default='loadtest-password')
+    parser.add_argument(
+        '--weights', type=parse_weights, default=parse_weights(''),
+        help='Веса сценариев: ' + ', '.join(
+            f'{name}={weight}' for name, (_, weight) in SCENARIOS.items()))
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int)
+    return parser.parse_args()
+
+
+async def login(client, email, password):
+    response = await client.call(
+        'POST', '/api/auth/token/login/',
+        json_data={'email': email, 'password': password},
+        expected=(200, 201))
+    if not response:
+        raise RuntimeError(f'Не удалось войти как {email}')
+    return response['auth_token']
+
+
+async def virtual_user(client, data, weights, deadline):
+    scenarios = [SCENARIOS[name][0] for name in weights]
+    while time.monotonic() < deadline:
+        scenario = random.choices(scenarios, list(weights.values()))[0]
+        await scenario(client, data)
+
+
+async def run(args):
+    schema = Schema(args.schema)
+    stats = Stats()
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    async with aiohttp.ClientSession(
+            connector=connector, timeout=timeout) as session:
+        # Подготовка не входит в результаты.
+        setup = Client(session, args.base_url, schema, Stats())
+        data = Data()
+        await data.load(setup)
+        tokens = await asyncio.gather(*(
+            login(setup, EMAIL.format(number % args.users), args.password)
+            for number in range(args.concurrency)))
+        started = time.monotonic()
+        await asyncio.gather(*(
+            virtual_user(
+                Client(session, args.base_url, schema, stats, token),
+                data, args.weights, started + args.duration)
+            for token in tokens))
+    print(stats.report(time.monotonic() - started))
+
+
+def main():
+    args = parse_args()
+    if args.seed is not None:
+        random.seed(args.seed)
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import math
+import time
+from collections import defaultdict
+
+import aiohttp
+
+OK_STATUSES = (200, 201, 204)
+THROTTLED = 429
+
+
+def percentile(values, percent):
+    """Процентиль по рангу (values отсортирован)."""
+    return values[max(math.ceil(percent / 100 * len(values)) - 1, 0)]
+
+
+class Stats:
+    """
+    Задержки и ошибки по операциям. Ответы 429 (ограничение частоты
+    запросов) не считаются ошибками и не входят в задержки: они
+    учитываются отдельно.
+    """
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.throttled = defaultdict(int)
+
+    def add(self, name, latency, ok, throttled=False):
+        if throttled:
+            self.throttled[name] += 1
+            return
+        self.latencies[name].append(latency)
+        if not ok:
+            self.errors[name] += 1
+
+    def report(self, elapsed):
+        header = (
+            f'{"Операция":<44}{"запросов":>9}{"в сек":>8}{"ошибки":>8}'
+            f'{"429":>8}{"p50":>8}{"p90":>8}{"p99":>8}{"max":>8}')
+        lines = [header, '-' * len(header)]
+        rows = sorted(self.latencies.items())
+        rows.append(('Всего', [
+            latency for values in self.latencies.values()
+            for latency in values]))
+        errors = dict(self.errors, **{'Всего': sum(self.errors.values())})
+        throttled = dict(
+            self.throttled, **{'Всего': sum(self.throttled.values())})
+        for name, values in rows:
+            if not values:
+                continue
+            values = sorted(values)
+            percentiles = ''.join(
+                f'{percentile(values, percent) * 1000:>8.0f}'
+                for percent in (50, 90, 99, 100))
+            lines.append(
+                f'{name[:43]:<44}{len(values):>9}'
+                f'{len(values) / elapsed:>8.1f}'
+                f'{errors.get(name, 0) / len(values):>8.1%}'
+                f'{throttled.get(name, 0):>8}{percentiles}')
+        lines.append(
+            'Задержки в миллисекундах, 429 - число ответов ограничения '
+            'частоты запросов (не входят в запросы и задержки).')
+        return '\n'.join(lines)
+
+
+class Client:
+    """
+    Запросы к API по операциям схемы: путь и параметры проверяются
+    по схеме, время ответа учитывается под именем операции.
+    """
+
+    def __init__(self, session, base_url, schema, stats, token=None):
+        self.session = session
+        self.base_url = base_url.rstrip('/')
+        self.schema = schema
+        self.stats = stats
+        self.token = token
+
+    async def call(self, method, template, params=None, json_data=None,
+                   expected=OK_STATUSES, **path_params):
+        """Ответ JSON, None при ошибке или ответе без JSON."""
+        operation = self.schema.operation(method, template)
+        if isinstance(params, dict):
+            params = list(params.items())
+        params = [(key, str(value)) for key, value in params or ()]
+        url = self.base_url + operation.url(
+            path_params, [key for key, _ in params])
+        headers = {}
+        if self.token:
+            headers['Authorization'] = f'Token {self.token}'
+        started = time.perf_counter()
+        try:
+            async with self.session.request(
+                    method, url, params=params, json=json_data,
+                    headers=headers, allow_redirects=False) as response:
+                body = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self.stats.add(
+                operation.name, time.perf_counter() - started, False)
+            return None
+        ok = response.status in expected
+        self.stats.add(
+            operation.name, time.perf_counter() - started, ok,
+            throttled=response.status == THROTTLED)
+        if ok and response.content_type == 'application/json':
+            return json.loads(body)
+        return None
@@ -0,0 +1,107 @@
+import math
+import random
+
+PAGE_SIZE = 6
+MAX_RECIPES = 5000
+
+
+class Data:
+    """Общие для виртуальных пользователей теги, ингредиенты и рецепты."""
+
+    def __init__(self):
+        self.tags = []
+        self.prefixes = []
+        self.recipe_ids = []
+        self.pages = 1
+
+    async def load(self, client):
+        tags = await client.call('GET', '/api/tags/') or []
+        self.tags = [tag['slug'] for tag in tags]
+        ingredients = await client.call('GET', '/api/ingredients/') or []
+        self.prefixes = sorted({
+            ingredient['name'][:length].lower()
+            for ingredient in ingredients for length in (1, 2, 3)})
+        page = await client.call('GET', '/api/recipes/')
+        if not page or not page['results'] or not self.prefixes:
+            raise RuntimeError(
+                'Нет данных для теста, выполните seed_loadtest_data')
+        self.pages = math.ceil(page['count'] / PAGE_SIZE)
+        self.remember(page)
+
+    def remember(self, page):
+        if not page:
+            return
+        for recipe in page['results']:
+            if len(self.recipe_ids) < MAX_RECIPES:
+                self.recipe_ids.append(recipe['id'])
+            else:
+                self.recipe_ids[random.randrange(MAX_RECIPES)] = recipe['id']
+
+    def recipes(self, count):
+        return random.sample(self.recipe_ids, min(count, len(self.recipe_ids)))
+
+
+async def browse(client, data):
+    """Просмотр страницы рецептов и нескольких рецептов с нее."""
+    page = await client.call(
+        'GET', '/api/recipes/', {'page': random.randint(1, data.pages)})
+    data.remember(page)
+    for recipe in random.sample(page['results'], 2) if page else ():
+        await client.call('GET', '/api/recipes/{id}/', id=recipe['id'])
+
+
+async def filter_tags(client, data):
+    """Список рецептов с фильтром по одному-двум тегам."""
+    tags = random.sample(data.tags, min(len(data.tags), random.randint(1, 2)))
+    page = await client.call(
+        'GET', '/api/recipes/',
+        [('tags', tag) for tag in tags] + [('page', random.randint(1, 3))])
+    data.remember(page)
+
+
+async def favorite(client, data):
+    """Добавление рецепта в избранное и удаление из него."""
+    for recipe_id in data.recipes(1):
+        await client.call(
+            'POST', '/api/recipes/{id}/favorite/', expected=(201, 400),
+            id=recipe_id)
+        await client.call(
+            'GET', '/api/recipes/', {'is_favorited': 1})
+        await client.call(
+            'DELETE', '/api/recipes/{id}/favorite/', expected=(204, 400),
+            id=recipe_id)
+
+
+async def build_cart(client, data):
+    """Сборка списка покупок из нескольких рецептов и его очистка."""
+    recipe_ids = data.recipes(3)
+    for recipe_id in recipe_ids:
+        await client.call(
+            'POST', '/api/recipes/{id}/shopping_cart/', expected=(201, 400),
+            id=recipe_id)
+    await client.call('GET', '/api/recipes/', {'is_in_shopping_cart': 1})
+    for recipe_id in recipe_ids:
+        await client.call(
+            'DELETE', '/api/recipes/{id}/shopping_cart/',
+            expected=(204, 400), id=recipe_id)
+
+
+async def download(client, data):
+    """Скачивание списка покупок (список заполнен seed_loadtest_data)."""
+    await client.call('GET', '/api/recipes/download_shopping_cart/')
+
+
+async def search_ingredients(client, data):
+    """Поиск ингредиента по началу названия, как при вводе в форме."""
+    await client.call(
+        'GET', '/api/ingredients/', {'name': random.choice(data.prefixes)})
+
+
+SCENARIOS = {
+    'browse': (browse, 35),
+    'filter_tags': (filter_tags, 20),
+    'favorite': (favorite, 10),
+    'build_cart': (build_cart, 10),
+    'download': (download, 5),
+    'search_ingredients': (search_ingredients, 20),
+}
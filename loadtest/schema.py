@@ -0,0 +1,45 @@
+import yaml
+
+METHODS = ('get', 'post', 'put', 'patch', 'delete')
+
+
+class Operation:
+    """Операция API из схемы OpenAPI."""
+
+    def __init__(self, method, template, data):
+        self.method = method.upper()
+        self.template = template
+        self.name = data.get('operationId') or f'{self.method} {template}'
+        self.parameters = {
+            parameter['name'] for parameter in data.get('parameters', ())
+            if 'name' in parameter
+        }
+
+    def url(self, path_params, query):
+        """Путь запроса; параметры, которых нет в схеме, - ошибка сценария."""
+        unknown = set(query or ()) - self.parameters
+        if unknown:
+            raise ValueError(
+                f'{self.method} {self.template}: параметров {unknown} '
+                f'нет в схеме')
+        return self.template.format(**path_params)
+
+
+class Schema:
+    """Операции из docs/openapi-schema.yml по методу и шаблону пути."""
+
+    def __init__(self, path):
+        with open(path, encoding='utf-8') as file:
+            document = yaml.safe_load(file)
+        self.operations = {
+            (method.upper(), template): Operation(method, template, data)
+            for template, item in document['paths'].items()
+            for method, data in item.items() if method in METHODS
+        }
+
+    def operation(self, method, template):
+        try:
+            return self.operations[method, template]
+        except KeyError:
+            raise ValueError(
+                f'Операции {method} {template} нет в схеме') from None